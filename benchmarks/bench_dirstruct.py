@@ -0,0 +1,114 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# benchmark
+import dirstruct
+from dirstruct import *
+
+
+class SyscallCounter (object):
+    """Counts the os calls made by os.makedirs while active."""
+
+    NAMES = ("makedirs", "mkdir", "stat")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.NAMES, 0)
+        self.originals = {}
+
+
+    def __enter__(self):
+        for name in self.NAMES:
+            original = getattr(os, name)
+            self.originals[name] = original
+            setattr(os, name, self.wrap(name, original))
+
+        return self
+
+
+    def __exit__(self, *_):
+        for name, original in self.originals.items():
+            setattr(os, name, original)
+
+
+    def wrap(self, name, original):
+        def wrapper(*args, **kwargs):
+            self.counts[name] += 1
+            return original(*args, **kwargs)
+
+        return wrapper
+
+
+def build(root: str) -> Directory:
+    class Paths (Directory):
+        class cache (Directory):
+            tmp = "tmp"
+            index = FilePath("index.db")
+
+        logs = "logs"
+
+    return Paths(root)
+
+
+def bench_access(paths: Directory) -> None:
+    number = 200_000
+    cases = {
+        "method": lambda: paths.upper,
+        "special": lambda: paths._include_,
+        "file": lambda: paths.cache.index,
+        "directory": lambda: paths.logs,
+        "nested": lambda: paths.cache.tmp,
+    }
+
+    print(f"{'attribute':<12}{'ns/access':>12}{'M access/s':>12}")
+
+    for name, function in cases.items():
+        elapsed = min(timeit.repeat(function, number=number, repeat=3)) / number
+        print(f"{name:<12}{elapsed * 1e9:>12.1f}{1e-6 / elapsed:>12.2f}")
+
+
+def main() -> None:
+    accesses = 10_000
+    root = tempfile.mkdtemp()
+
+    try:
+        paths = build(root)
+
+        def legacy():
+            # Forgetting the registry before each access reproduces the previous behaviour.
+            dirstruct.invalidate()
+            return paths.cache.tmp
+
+        def current():
+            return paths.cache.tmp
+
+        print(f"{'mode':<10}{'makedirs':>10}{'mkdir':>10}{'stat':>10}{'us/access':>12}")
+
+        for name, function in (("legacy", legacy), ("current", current)):
+            with SyscallCounter() as counter:
+                for _ in range(accesses):
+                    function()
+
+            elapsed = min(timeit.repeat(function, number=accesses, repeat=3)) / accesses
+            counts = [counter.counts[key] / accesses for key in SyscallCounter.NAMES]
+            print(f"{name:<10}" + "".join(f"{count:>10.3f}" for count in counts) + f"{elapsed * 1e6:>12.2f}")
+
+        print()
+        bench_access(paths)
+
+    finally:
+        shutil.rmtree(root)
+        dirstruct.invalidate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import tempfile
+import statistics
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+MODULES = ("typex", "threadextra", "internationalization", "osenvutils", "strutils", "dirstruct", "ezconfiguration")
+ROUNDS = 20
+
+
+def run(args: list[str], env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=SRC, env=env, capture_output=True, text=True, check=True)
+
+
+def cold_import(module: str, env: dict) -> float:
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    return statistics.median(float(run(["-c", code], env).stdout) for _ in range(ROUNDS))
+
+
+def heaviest(module: str, env: dict, top: int = 4) -> list[tuple[str, int]]:
+    """The direct dependencies with the largest cumulative import time, from `-X importtime`."""
+    lines = run(["-X", "importtime", "-c", f"import {module}"], env).stderr.splitlines()
+    direct = []
+
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+
+        # Children are printed before their parent, a top level line closes the block of the previous module.
+        # 子模块先于父模块输出, 顶层行结束上一个模块的区块.
+        if not name.startswith("  "):
+            if name.strip() == module:
+                break
+
+            direct = []
+
+        # Direct dependencies are indented by exactly two more spaces.
+        # 直接依赖恰好多缩进两个空格.
+        elif not name.startswith("    "):
+            direct.append((name.strip(), int(cumulative)))
+
+    return sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as prefix:
+        # Measure with cached bytecode as in a deployed service, even if the environment disables it.
+        # 与部署的服务一样使用缓存的字节码进行测量, 即使环境禁用了字节码缓存.
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=prefix)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+        for module in MODULES:
+            run(["-c", f"import {module}"], env)
+
+        baseline = cold_import("sys", env)
+        print(f"interpreter baseline: {baseline * 1e3:.2f} ms")
+
+        for module in MODULES:
+            dependencies = ", ".join(f"{name} {cumulative / 1e3:.1f}" for name, cumulative in heaviest(module, env))
+            print(f"{module:>20}: {cold_import(module, env) * 1e3:6.2f} ms  [{dependencies}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import timeit
+import datetime
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+
+# benchmark
+import osenvutils
+
+
+IMPORT_TIMER = """
+import sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import osenvutils
+middle = time.perf_counter()
+osenvutils.UUID
+end = time.perf_counter()
+print(middle - start, end - middle)
+"""
+
+
+class LegacyDateTimeVariable (object):
+    """The field access path before snapshots, kept for comparison."""
+
+    def __getattr__(self, __name: str):
+        now = datetime.datetime.now()
+
+        match __name:
+            case "date":
+                return now.strftime("%Y-%m-%d")
+
+            case "time":
+                return now.strftime("%H:%M:%S")
+
+            case "microsecond":
+                return now.strftime("%f")
+
+            case "timestamp_ms":
+                return int(now.timestamp() * 10 ** 3)
+
+            case "timestamp_ms_hex":
+                return hex(self.timestamp_ms)
+
+            case "timestamp_ms_hex_up":
+                return self.timestamp_ms_hex.upper().replace("X", "x")
+
+            case "timestamp_ms_hex_simple_up":
+                return self.timestamp_ms_hex_up.replace("0x", "")
+
+        raise AttributeError(__name)
+
+
+def log_record(variable) -> tuple:
+    # The fields a log line is usually stamped with.
+    return variable.date, variable.time, variable.microsecond, variable.timestamp_ms_hex_simple_up
+
+
+def bench_fields(number: int = 50_000) -> None:
+    variable = osenvutils.DateTimeVariable()
+    cached = osenvutils.DateTimeVariable(resolution=0.001)
+
+    cases = {
+        "legacy": lambda: log_record(LegacyDateTimeVariable()),
+        "current": lambda: log_record(variable),
+        "snapshot": lambda: log_record(variable.snapshot()),
+        "cached 1ms": lambda: log_record(cached),
+    }
+
+    print(f"{'fields per record':<24}{'us/record':>10}{'k records/s':>14}")
+
+    for name, function in cases.items():
+        elapsed = min(timeit.repeat(function, number=number, repeat=3)) / number
+        print(f"{name:<24}{elapsed * 1e6:>10.2f}{1e-3 / elapsed:>14.1f}")
+
+
+def bench_import(repeat: int = 10) -> None:
+    # Every sample is a fresh interpreter, so nothing is cached between them.
+    code = IMPORT_TIMER.format(src=SRC)
+    samples = []
+
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        samples.append(tuple(map(float, output.split())))
+
+    imports = sorted(sample[0] for sample in samples)
+    uuids = sorted(sample[1] for sample in samples)
+
+    print(f"{'cold import':<24}{imports[len(imports) // 2] * 1e3:>10.2f} ms (median of {repeat})")
+    print(f"{'first UUID access':<24}{uuids[len(uuids) // 2] * 1e3:>10.2f} ms (median of {repeat})")
+
+
+def main() -> None:
+    bench_import()
+    print()
+    bench_fields()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# benchmark
+import strutils
+
+
+def legacy_escape_character_recognition(value: str) -> str:
+    table = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+    _input = value
+    output = ""
+
+    while True:
+        result = _input.find("\\")
+        if result == -1:
+            output += _input
+            break
+
+        output += _input[:result]
+        _input = _input[result+1:]
+
+        if not _input:
+            output += "\\"
+            break
+
+        if _input[0] not in table:
+            output += "\\"
+            continue
+
+        output += table[_input[0]]
+        _input = _input[1:]
+
+    return output
+
+
+# Pathological inputs: escape dense, unknown escape dense, long plain text and a trailing backslash.
+CASES = {
+    "plain_1k": "x" * 1000,
+    "plain_100k": "x" * 100_000,
+    "escapes_1k": "\\n" * 500,
+    "escapes_20k": "\\n" * 10_000,
+    "unknown_20k": "\\q" * 10_000,
+    "backslashes_20k": "\\" * 20_000,
+    "mixed_20k": "ab\\tcd\\\\ef\\qgh\\r" * 1_250 + "\\",
+}
+
+
+def bench(function, value: str, number: int) -> float:
+    return min(timeit.repeat(lambda: function(value), number=number, repeat=3)) / number
+
+
+# A 100k line catalog, one value in ten contains an escape.
+CATALOG = [f"value number {index}\\t{index}" if index % 10 == 0 else f"value number {index}" for index in range(100_000)]
+
+
+def main() -> None:
+    print(f"{'case':<18}{'legacy (us)':>14}{'current (us)':>14}{'speedup':>10}")
+
+    for name, value in CASES.items():
+        number = 20 if len(value) > 10_000 else 200
+        legacy = bench(legacy_escape_character_recognition, value, number)
+        current = bench(strutils.escape_character_recognition, value, number)
+        print(f"{name:<18}{legacy * 1e6:>14.1f}{current * 1e6:>14.1f}{legacy / current:>9.1f}x")
+
+    print()
+    print(f"{'catalog 100k':<18}{'time (ms)':>14}")
+
+    decode = strutils.escape_decode
+    loop = min(timeit.repeat(lambda: [decode(value) for value in CATALOG], number=1, repeat=3))
+    batch = min(timeit.repeat(lambda: strutils.escape_decode_batch(CATALOG), number=1, repeat=3))
+    stream = min(timeit.repeat(lambda: list(strutils.escape_decode_iter(CATALOG)), number=1, repeat=3))
+
+    print(f"{'per value':<18}{loop * 1e3:>14.2f}")
+    print(f"{'batch':<18}{batch * 1e3:>14.2f}")
+    print(f"{'stream':<18}{stream * 1e3:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
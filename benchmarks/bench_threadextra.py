@@ -0,0 +1,167 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import time
+import asyncio
+import statistics
+import concurrent.futures
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+
+# benchmark
+import threadextra
+
+
+TASKS = 20000
+WORKERS = 8
+
+
+def busy(seconds: float) -> None:
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        ...
+
+
+def throughput(executor: concurrent.futures.Executor) -> float:
+    start = time.perf_counter()
+    futures = [executor.submit(abs, index) for index in range(TASKS)]
+
+    for future in futures:
+        future.result()
+
+    return TASKS / (time.perf_counter() - start)
+
+
+def cooperative(seconds: float) -> None:
+    threadextra.current_token().sleep(seconds)
+
+
+def cancellation_latency(task, rounds: int = 20, timeout: float = 0.02, grace: float = 0.05) -> list[float]:
+    latencies = []
+
+    with threadextra.ThreadPoolExecutorExtra(max_workers=2, grace=grace) as executor:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            future = executor.submit_with_deadline(timeout, task, 10)
+
+            try:
+                future.result()
+
+            except threadextra.TaskDeadlineExceeded as _:
+                ...
+
+            latencies.append(time.perf_counter() - start - timeout)
+
+    return latencies
+
+
+async def bridge_overhead(calls: int = 5000) -> tuple[float, float]:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await asyncio.gather(*(loop.run_in_executor(None, abs, index) for index in range(calls)))
+    default = calls / (time.perf_counter() - start)
+
+    bridge = threadextra.AsyncBridge()
+    start = time.perf_counter()
+    await asyncio.gather(*(bridge.run(abs, index) for index in range(calls)))
+    return default, calls / (time.perf_counter() - start)
+
+
+async def bridge_timeout_latency(rounds: int = 20, timeout: float = 0.02) -> list[float]:
+    bridge = threadextra.AsyncBridge()
+    latencies = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+
+        try:
+            async with asyncio.timeout(timeout):
+                await bridge.run(cooperative, 10)
+
+        except TimeoutError as _:
+            ...
+
+        latencies.append(time.perf_counter() - start - timeout)
+
+    return latencies
+
+
+def serial_shutdown(count: int = 200) -> float:
+    """The pattern before ThreadGroup, force_stop and join one by one."""
+    def target():
+        try:
+            while True:
+                time.sleep(0.05)
+
+        except SystemExit as _:
+            ...
+
+    threads = [threadextra.ThreadExtra(target=target, daemon=True) for _ in range(count)]
+
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+
+    for thread in threads:
+        thread.force_stop()
+        thread.join(1)
+
+    return time.perf_counter() - start
+
+
+def group_shutdown(count: int = 200) -> float:
+    group = threadextra.ThreadGroup()
+
+    for _ in range(count):
+        group.spawn(cooperative, 60)
+
+    start = time.perf_counter()
+    group.stop(timeout=1)
+    return time.perf_counter() - start
+
+
+def main():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        print(f"ThreadPoolExecutor:                   {throughput(executor):>10.0f} tasks/s")
+
+    with threadextra.ThreadPoolExecutorExtra(max_workers=WORKERS) as executor:
+        print(f"ThreadPoolExecutorExtra:              {throughput(executor):>10.0f} tasks/s")
+
+    with threadextra.ThreadPoolExecutorExtra(max_workers=WORKERS, timeout=60) as executor:
+        print(f"ThreadPoolExecutorExtra (deadlines):  {throughput(executor):>10.0f} tasks/s")
+
+    threadextra.enable_registry()
+
+    with threadextra.ThreadPoolExecutorExtra(max_workers=WORKERS) as executor:
+        print(f"ThreadPoolExecutorExtra (registry):   {throughput(executor):>10.0f} tasks/s")
+
+    profiler = threadextra.SamplingProfiler(interval=0.01)
+    profiler.start()
+
+    with threadextra.ThreadPoolExecutorExtra(max_workers=WORKERS) as executor:
+        print(f"ThreadPoolExecutorExtra (profiler):   {throughput(executor):>10.0f} tasks/s")
+
+    profiler.stop()
+    threadextra.disable_registry()
+    print(f"profiler samples: {profiler.samples}, hottest: {profiler.hot(1)}")
+
+    for label, task in (("cooperative (token.sleep)", cooperative), ("forced (busy loop, 50 ms grace)", busy)):
+        latencies = cancellation_latency(task)
+        print(f"cancellation latency, {label}: median {statistics.median(latencies) * 1e3:.2f} ms, max {max(latencies) * 1e3:.2f} ms")
+
+    print(f"shutdown of 200 threads: serial force_stop + join {serial_shutdown() * 1e3:.1f} ms, ThreadGroup.stop {group_shutdown() * 1e3:.1f} ms")
+
+    default, bridged = asyncio.run(bridge_overhead())
+    print(f"run_in_executor: {default:>10.0f} calls/s, AsyncBridge.run: {bridged:>10.0f} calls/s")
+    latencies = asyncio.run(bridge_timeout_latency())
+    print(f"asyncio.timeout latency (token.sleep): median {statistics.median(latencies) * 1e3:.2f} ms, max {max(latencies) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import time
+import timeit
+import threading
+import tracemalloc
+import dataclasses
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+
+# benchmark
+import typex
+
+
+THREADS = 8
+ROUNDS = 20
+RECORDS = 100000
+
+
+class LegacySingleton (object):
+    """The singleton before the per-class lock, kept for comparison."""
+
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(cls, "_singleton_instance"):
+            cls._singleton_init_method = cls.__init__
+            cls.__init__ = LegacySingleton.__init__
+            cls._singleton_instance = super(LegacySingleton, cls).__new__(cls)
+        return cls._singleton_instance
+
+    def __init__(self, *args, **kwargs) -> None:
+        cls = self.__class__
+        if not hasattr(cls, "_singleton_initialized") or not cls._singleton_initialized:
+            cls._singleton_initialized = True
+            self._singleton_init_method(*args, **kwargs)
+
+
+def make(base: type, calls: list) -> type:
+    class Service (base):
+        def __init__(self):
+            calls.append(1)
+            time.sleep(0.001)
+            self.ready = True
+
+    return Service
+
+
+def contention(base: type) -> tuple[int, int, int, float]:
+    """Construct a fresh class from all threads at once, returns (inits, instances, uninitialized, seconds)."""
+    inits = 0
+    instances = 0
+    uninitialized = 0
+    elapsed = 0.0
+
+    for _ in range(ROUNDS):
+        calls = []
+        cls = make(base, calls)
+        barrier = threading.Barrier(THREADS)
+        seen = set()
+        early = []
+
+        def construct():
+            barrier.wait()
+            for _ in range(10000):
+                instance = cls()
+                seen.add(id(instance))
+                if not hasattr(instance, "ready"):
+                    early.append(1)
+
+        threads = [threading.Thread(target=construct) for _ in range(THREADS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed += time.perf_counter() - start
+
+        inits += len(calls)
+        instances += len(seen)
+        uninitialized += len(early)
+
+    return inits, instances, uninitialized, elapsed
+
+
+class PlainEntry (object):
+    def __init__(self, index: int, value: float, name: str):
+        self.index = index
+        self.value = value
+        self.name = name
+
+
+@dataclasses.dataclass
+class DataEntry (object):
+    index: int
+    value: float
+    name: str
+
+
+@dataclasses.dataclass(slots=True)
+class SlotsDataEntry (object):
+    index: int
+    value: float
+    name: str
+
+
+class RecordEntry (typex.record):
+    index: int
+    value: float
+    name: str
+
+
+class FrozenRecordEntry (typex.record, frozen=True):
+    index: int
+    value: float
+    name: str
+
+
+def records() -> None:
+    names = [str(index % 100) for index in range(RECORDS)]
+
+    for cls in (PlainEntry, DataEntry, SlotsDataEntry, RecordEntry, FrozenRecordEntry):
+        tracemalloc.start()
+        items = [cls(index, index * 0.5, names[index]) for index in range(RECORDS)]
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del items
+
+        construct = min(timeit.repeat(lambda: cls(1, 0.5, "a"), number=200000, repeat=5)) / 200000
+        print(f"{cls.__name__:>17}: {memory / RECORDS:6.1f} bytes per record, {construct * 1e9:6.1f} ns per construction")
+
+    tracemalloc.start()
+    items = typex.RecordArray(RecordEntry)
+    for index in range(RECORDS):
+        items.append((index, index * 0.5, names[index]))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{'RecordArray':>17}: {memory / RECORDS:6.1f} bytes per record")
+
+
+def main():
+    for label, base in (("legacy", LegacySingleton), ("typex.singleton", typex.singleton)):
+        cls = make(base, [])
+        cls()
+        per_call = min(timeit.repeat(cls, number=200000, repeat=5)) / 200000
+        inits, instances, uninitialized, elapsed = contention(base)
+        print(f"{label:>16}: {per_call * 1e9:7.1f} ns per construction, "
+              f"{THREADS} threads x {ROUNDS} rounds: {inits} inits, {instances} instances, "
+              f"{uninitialized} uninitialized reads, {elapsed:.3f} s")
+
+    for base in (typex.lazy_singleton, typex.thread_singleton, typex.context_singleton):
+        cls = make(base, [])
+        instance = cls()
+        construct = min(timeit.repeat(cls, number=200000, repeat=5)) / 200000
+        access = min(timeit.repeat(lambda: instance.ready, number=200000, repeat=5)) / 200000
+        print(f"{base.__name__:>17}: {construct * 1e9:7.1f} ns per construction, {access * 1e9:7.1f} ns per attribute access")
+
+    records()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# benchmark
+
+# std
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import timeit
+import statistics
+import argparse
+import platform
+import tempfile
+from typing import Callable, NamedTuple
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.append(SRC)
+
+# benchmark
+import typex
+import strutils
+import dirstruct
+import osenvutils
+import ezconfiguration
+import internationalization
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SCALES = {"small": 100, "medium": 1000, "large": 10000}
+
+# Smallest relative slowdown against the baseline that counts as a regression.
+# 相对基线的减速至少超过该比例才视为性能回退.
+THRESHOLD = 0.25
+
+# The limit of a case widens to this many times its spread between runs, in the baseline or the current results.
+# 用例的阈值会放宽到其多次运行间离散度的该倍数, 取基线与当前结果中的较大者.
+NOISE = 5
+
+# Calibration by one reference workload is approximate, this share of how far the reference moved from the baseline
+# is added to the limit of a case.
+# 单一参考负载的校准只是近似的, 参考负载相对基线变化幅度的该比例会加到用例的阈值上.
+CALIBRATION = 0.5
+
+
+class Case (NamedTuple):
+    """
+    A benchmark, setup receives the item count and a scratch directory and returns (function, items per call).
+    scales limits the case to some of the scales, None runs all of them.
+    """
+    name: str
+    setup: Callable[[int, str], tuple[Callable[[], object], int]]
+    scales: tuple[str, ...] | None = None
+
+
+
+# Synthetic data, every generator is seeded so runs compare the same inputs.
+# 合成数据, 每个生成器都使用固定种子, 保证每次运行比较的是相同的输入.
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9))) for _ in range(count))
+
+
+def escaped_values(count: int) -> list[str]:
+    rng = random.Random(1)
+    escapes = ("\\n", "\\t", "\\r", "\\\\", "")
+    return [f"{words(rng, 3)}{rng.choice(escapes)}{words(rng, 2)}{rng.choice(escapes)}" for _ in range(count)]
+
+
+def config_data(count: int) -> dict[str, int | float | str]:
+    rng = random.Random(2)
+    data = {}
+
+    for index in range(count):
+        match index % 3:
+            case 0: data[f"option_{index}"] = rng.randint(0, 1000)
+            case 1: data[f"option_{index}"] = rng.random()
+            case 2: data[f"option_{index}"] = words(rng, 2)
+
+    return data
+
+
+def new_configuration(data: dict) -> ezconfiguration.Configuration:
+    configuration = ezconfiguration.Configuration()
+
+    for key, value in data.items():
+        configuration._new(key, type(value), value)
+
+    return configuration
+
+
+def write_lang_files(root: str, count: int, locales: tuple[str, ...] = ("en_US", "zh_CN", "ja_JP")) -> None:
+    rng = random.Random(3)
+    values = escaped_values(count)
+
+    for locale in locales:
+        lines = ["#define superiors app\n"]
+
+        for index, value in enumerate(values):
+            if index % 10 == 0:
+                lines.append(f'key_{index} = "{value}" +\\\n')
+                lines.append(f'    "{words(rng, 2)}"\n')
+
+            else:
+                lines.append(f"key_{index} = {value}\n")
+
+        with open(os.path.join(root, f"{locale}.lang"), "w", encoding="utf-8") as fobj:
+            fobj.writelines(lines)
+
+
+
+# Cases.
+# 用例.
+
+def setup_config_get(count: int, _: str):
+    configuration = new_configuration(config_data(count))
+    keys = list(config_data(count))
+    get = configuration._get
+
+    def run():
+        for key in keys:
+            get(key)
+
+    return run, count
+
+
+def setup_config_set(count: int, _: str):
+    data = config_data(count)
+    configuration = new_configuration(data)
+    items = list(data.items())
+    set_ = configuration._set
+
+    def run():
+        for key, value in items:
+            set_(key, value)
+
+    return run, count
+
+
+def setup_config_load_json(count: int, scratch: str):
+    data = config_data(count)
+    configuration = new_configuration(data)
+    path = os.path.join(scratch, "config.json")
+
+    with open(path, "w", encoding="utf-8") as fobj:
+        json.dump(data, fobj)
+
+    return lambda: configuration._load_json(path), count
+
+
+def setup_i18n_get_value(count: int, scratch: str):
+    write_lang_files(scratch, count)
+    i18n = internationalization.Internationalization()
+    i18n._con_load_auto(scratch)
+    i18n._con_set_lang("zh_CN")
+    rng = random.Random(4)
+
+    # One key in ten misses and falls back to the key itself.
+    # 每十个键中有一个未命中, 回退为键本身.
+    keys = [f"app.key_{rng.randrange(count)}" if index % 10 else f"app.missing_{index}" for index in range(count)]
+    get = i18n._con_get_value
+
+    def run():
+        for key in keys:
+            get(key)
+
+    return run, count
+
+
+def setup_i18n_load_auto(count: int, scratch: str):
+    write_lang_files(scratch, count)
+    return lambda: internationalization.Internationalization()._con_load_auto(scratch), count * 3
+
+
+def setup_escape(count: int, _: str):
+    values = escaped_values(count)
+    recognize = strutils.escape_character_recognition
+
+    def run():
+        for value in values:
+            recognize(value)
+
+    return run, count
+
+
+def new_directory_class(count: int) -> tuple[type, list[str]]:
+    names = [f"folder_{index}" for index in range(count)]
+    return type("Generated", (dirstruct.Directory,), dict(zip(names, names))), names
+
+
+def setup_directory_cached_access(count: int, scratch: str):
+    # Reads of attributes that were already resolved once.
+    # 读取已经解析过一次的属性.
+    cls, names = new_directory_class(count)
+    directory = cls(scratch)
+
+    for name in names:
+        getattr(directory, name)
+
+    def run():
+        for name in names:
+            getattr(directory, name)
+
+    return run, count
+
+
+def setup_directory_first_resolution(count: int, scratch: str):
+    # Every call resolves the attributes of a fresh instance, the directories on disk exist after the first call.
+    # 每次调用都在新实例上解析属性, 第一次调用后磁盘上的目录已经存在.
+    cls, names = new_directory_class(count)
+
+    def run():
+        directory = cls(scratch)
+
+        for name in names:
+            getattr(directory, name)
+
+    return run, count
+
+
+def setup_datetime_fields(count: int, _: str):
+    variable = osenvutils.DateTimeVariable()
+    fields = ("date", "time", "timestamp_ms", "timestamp_hex")
+
+    def run():
+        for _ in range(count):
+            for field in fields:
+                getattr(variable, field)
+
+    return run, count * len(fields)
+
+
+def setup_singleton(count: int, _: str):
+    class Service (typex.singleton):
+        def __init__(self):
+            self.ready = True
+
+    def run():
+        for _ in range(count):
+            Service()
+
+    return run, count
+
+
+CASES = [
+    Case("ezconfiguration.get", setup_config_get),
+    Case("ezconfiguration.set", setup_config_set),
+    Case("ezconfiguration.load_json", setup_config_load_json),
+    Case("internationalization.get_value", setup_i18n_get_value),
+    Case("internationalization.load_auto", setup_i18n_load_auto),
+    Case("strutils.escape_character_recognition", setup_escape),
+    # Every attribute is a directory on disk, large is left out to keep the setup short.
+    # 每个属性都是磁盘上的目录, 省略 large 以缩短准备时间.
+    Case("dirstruct.cached_access", setup_directory_cached_access, ("small", "medium")),
+    Case("dirstruct.first_resolution", setup_directory_first_resolution, ("small", "medium")),
+    Case("osenvutils.datetime_fields", setup_datetime_fields),
+    Case("typex.singleton", setup_singleton),
+]
+
+
+def setup_reference(count: int, scratch: str):
+    """A fixed workload of plain interpreter work, it calibrates the speed of the host and never changes."""
+    keys = [f"key_{index}" for index in range(count)]
+
+    def function():
+        table = {key: len(key) * index for index, key in enumerate(keys)}
+        return sorted(table.items(), key=lambda item: item[1])
+
+    return function, count
+
+
+# Sampled alongside every case, the ratio of a case against the baseline is divided by the ratio of the reference
+# timed next to it, so a slower, busier or drifting host does not flag every case.
+# 与每个用例交替采样, 用例相对基线的比值会除以紧邻其计时的参考负载的比值,
+# 使较慢, 繁忙或性能漂移的主机不会让所有用例都被标记.
+REFERENCE = Case("reference", setup_reference)
+
+
+def measure(case: Case, count: int, repeat: int) -> tuple[int, float, float]:
+    """
+    Set the case up in a fresh scratch directory,
+    returns (items per call, best nanoseconds per item, best nanoseconds per item of the reference).
+    """
+    scratch = tempfile.mkdtemp()
+
+    try:
+        function, items = case.setup(count, scratch)
+        calibration, calibration_items = REFERENCE.setup(SCALES["medium"], scratch)
+        timers = [(timeit.Timer(function), items), (timeit.Timer(calibration), calibration_items)]
+        best = [float("inf"), float("inf")]
+
+        # Enough calls per sample to run for about 50 ms.
+        # 每个样本调用足够多次, 使其运行约 50 毫秒.
+        numbers = [max(1, int(0.05 / max(timer.timeit(1), 1e-9))) for timer, _ in timers]
+
+        # Samples of the case and the reference alternate, both see the same state of the machine.
+        # 用例与参考负载的样本交替进行, 两者经历相同的机器状态.
+        for _ in range(repeat):
+            for index, (timer, size) in enumerate(timers):
+                best[index] = min(best[index], timer.timeit(numbers[index]) / numbers[index] / size * 1e9)
+
+        return items, best[0], best[1]
+
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        dirstruct.invalidate()
+
+
+def run(scales: list[str], repeat: int, runs: int, pattern: str | None) -> dict:
+    cases = [case for case in CASES if not pattern or pattern in case.name]
+    samples = {}
+
+    # Whole runs of the suite are repeated rather than each case, so slow drifts of the machine spread over every case.
+    # 重复的是整个套件而不是单个用例, 使机器的缓慢漂移分摊到每个用例上.
+    for _ in range(runs):
+        for case in cases:
+            for scale in scales:
+                if case.scales is None or scale in case.scales:
+                    items, value, calibration = measure(case, SCALES[scale], repeat)
+                    values, calibrations = samples.setdefault(f"{case.name}@{scale}", (items, [], []))[1:]
+                    values.append(value)
+                    calibrations.append(calibration)
+
+    results = {}
+
+    for key, (items, values, calibrations) in samples.items():
+        median, spread = summarize(values)
+
+        # Every run is divided by the reference sampled next to it before taking the median,
+        # so a run on a slowed down machine lands where the others do.
+        # 每次运行先除以与其相邻采样的参考负载再取中位数,
+        # 使机器变慢时的运行结果与其他运行保持一致.
+        calibrated, calibrated_spread = summarize([value / calibration for value, calibration in zip(values, calibrations)])
+
+        results[key] = {
+            "items": items,
+            "ns_per_item": median,
+            "spread": spread,
+            "runs": values,
+            "reference": calibrations,
+            "calibrated": calibrated,
+            "calibrated_spread": calibrated_spread,
+        }
+
+        print(f"{key:<50}{median:>12.1f} ns/item  spread {spread:.1%}  calibrated spread {calibrated_spread:.1%}")
+
+    everything = [value for _, _, calibrations in samples.values() for value in calibrations]
+    reference = None
+
+    if everything:
+        median, spread = summarize(everything)
+        reference = {"ns_per_item": median, "spread": spread}
+        print(f"{REFERENCE.name:<50}{median:>12.1f} ns/item  spread {spread:.1%}")
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": runs,
+        "reference": reference,
+        "results": results,
+    }
+
+
+def summarize(values: list[float]) -> tuple[float, float]:
+    """Returns (median, spread) of the runs."""
+    median = statistics.median(values)
+
+    # Spread is the median absolute deviation of the runs relative to their median,
+    # a run slowed down by the machine moves neither of them.
+    # 离散度为各次运行的中位数绝对偏差相对于其中位数的比例,
+    # 被机器拖慢的单次运行不会影响这两者.
+    return median, statistics.median(abs(value - median) for value in values) / median
+
+
+def comparable(current: dict, baseline: dict) -> bool:
+    """Whether the timings of the baseline can be compared with the current ones at all."""
+    if current["python"].split(".")[:2] != baseline["python"].split(".")[:2]:
+        print(f"baseline was recorded with Python {baseline['python']}, not comparable with {current['python']}")
+        return False
+
+    # A baseline without reference timings only compares on the host that recorded it.
+    # 没有参考负载计时的基线只能在记录它的主机上比较.
+    if not baseline.get("reference") and current["platform"] != baseline["platform"]:
+        print(f"baseline was recorded on {baseline['platform']} without a reference workload, not comparable")
+        return False
+
+    return True
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str] | None:
+    """Print the calibrated ratio of every case against the baseline, returns the regressed cases or None when not comparable."""
+    if not comparable(current, baseline):
+        return None
+
+    regressions = []
+
+    if baseline.get("reference") and current.get("reference"):
+        factor = current["reference"]["ns_per_item"] / baseline["reference"]["ns_per_item"]
+        print(f"{REFERENCE.name:<50}{factor:>8.2f}x  (every ratio below is calibrated by its own reference)")
+
+    for key, result in current["results"].items():
+        reference = baseline["results"].get(key)
+
+        if reference is None:
+            continue
+
+        if "calibrated" in reference:
+            ratio = result["calibrated"] / reference["calibrated"]
+            spread = max(result["calibrated_spread"], reference["calibrated_spread"])
+            drift = abs(statistics.median(result["reference"]) / statistics.median(reference["reference"]) - 1)
+
+        else:
+            ratio = result["ns_per_item"] / reference["ns_per_item"]
+            spread = max(result.get("spread", 0), reference.get("spread", 0))
+            drift = 0
+
+        limit = 1 + max(threshold, NOISE * spread) + CALIBRATION * drift
+        status = "REGRESSION" if ratio > limit else "ok"
+        print(f"{key:<50}{ratio:>8.2f}x  (limit {limit:.2f}x)  {status}")
+
+        if ratio > limit:
+            regressions.append(key)
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite for the simplepylibs hot paths.")
+    parser.add_argument("--scale", action="append", choices=list(SCALES), help="item counts to run, repeatable, defaults to all")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case and run, the fastest one is kept")
+    parser.add_argument("--runs", type=int, default=5, help="runs of the suite, the median of the runs is reported")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="smallest relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    current = run(args.scale or list(SCALES), args.repeat, args.runs, args.filter)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fobj:
+            json.dump(current, fobj, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fobj:
+            json.dump(current, fobj, indent=4)
+
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as fobj:
+        baseline = json.load(fobj)
+
+    print()
+    regressions = compare(current, baseline, args.threshold)
+
+    if regressions is None:
+        print("run with --save-baseline on this host to record a comparable baseline")
+        return 0
+
+    print(f"\n{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
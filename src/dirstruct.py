@@ -4,8 +4,11 @@
 
 # std
 import os
-import inspect
-from typing import Any
+import time
+import heapq
+import types
+import threading
+from typing import Any, Iterator, Mapping, NamedTuple
 
 
 __name__ = "dirstruct"
@@ -13,10 +16,98 @@ __author__ = "numlinka"
 __license__ = "LGPL 3.0"
 __copyright__ = "Copyright (C) 2022 numlinka"
 
-__version_info__ = (1, 3, 0)
+__version_info__ = (1, 9, 5)
 __version__ = ".".join(map(str, __version_info__))
 
 
+# Directories created or found by this process, so that each path is created at most once.
+# Paths are recorded as they are computed, call `invalidate` after changing the working directory.
+# 本进程已创建或已找到的目录, 以便每个路径最多只创建一次.
+# 路径按计算结果原样记录, 更改工作目录后请调用 `invalidate`.
+_created_directories = set()
+
+
+def _makedirs(path: str) -> None:
+    if path in _created_directories:
+        return
+
+    try:
+        os.makedirs(path, exist_ok=True)
+
+    except OSError as _:
+        return
+
+    _created_directories.add(str.__str__(path))
+
+
+def invalidate(path: str | None = None) -> None:
+    """
+    ## Invalidate created directories
+    ## 使已创建目录的记录失效
+
+    Forget that a directory and its subdirectories were created, so they will be checked again on the next access.
+    Forget all directories when path is None.
+
+    忘记某个目录及其子目录已被创建, 以便下次访问时重新检查.
+    path 为 None 时忘记所有目录.
+    """
+    if path is None:
+        _created_directories.clear()
+        return
+
+    prefix = os.path.join(path, "")
+
+    for item in list(_created_directories):
+        if item == path or item.startswith(prefix):
+            _created_directories.discard(item)
+
+
+def recheck() -> list[str]:
+    """
+    ## Recheck created directories
+    ## 重新检查已创建的目录
+
+    Forget the directories that no longer exist, they will be created again on the next access.
+
+    忘记已不存在的目录, 下次访问时将重新创建它们.
+
+    ```TEXT
+    return:
+        list[str]
+        Directories that no longer exist.
+        已不存在的目录.
+    ```
+    """
+    missing = [item for item in list(_created_directories) if not os.path.isdir(item)]
+
+    for item in missing:
+        _created_directories.discard(item)
+
+    return missing
+
+
+# Attribute kinds of the per-class dispatch table and of resolved values.
+# 每个类的分派表与已解析值的属性类别.
+_PASSTHROUGH = 0
+_FILE = 1
+_DIRECTORY = 2
+_NESTED = 3
+
+# Striped locks taken by the first resolution and by the assignment of an attribute, keyed by instance and name.
+# A fixed pool keeps long-lived instances from growing a lock for every name ever looked up.
+# 属性首次解析与赋值时使用的分段锁, 以实例和名称为键.
+# 固定大小的锁池使长期存在的实例不会为每个查找过的名称都增加一把锁.
+_locks = tuple(threading.Lock() for _ in range(64))
+
+
+def _lock(directory: "Directory", name: str) -> threading.Lock:
+    return _locks[hash((id(directory), name)) % len(_locks)]
+
+
+def _internal(name: str) -> bool:
+    return name.startswith("_") and name.endswith("_")
+
+
 class FilePath (str):
     """File path, it will not be created as a directory."""
 
@@ -46,74 +137,949 @@ class Directory (DirectoryPath):
     # 未找到目录时是否创建该目录.
     _makedirs_ = True
 
+    # Retention policy enforced by `Evictor` on this directory and its subdirectories, None means unbounded.
+    # 由 `Evictor` 对此目录及其子目录执行的保留策略, None 表示不限制.
+    _retention_ = None
+
+    # Per-class dispatch table, maps class attribute names to their kind, built by __init_subclass__.
+    # Names that are not in the table, such as instance attributes, take the full resolution path.
+    # 每个类的分派表, 将类属性名映射到其类别, 由 __init_subclass__ 构建.
+    # 不在表中的名称 (例如实例属性) 走完整的解析流程.
+    _dispatch_ = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_ = _build_dispatch(cls)
+
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls, *args, **kwargs)
+
+        # Resolved paths of this instance: name -> (value, kind, whether to check the created directories).
+        # Entries are only published once fully resolved, so reading them needs no lock.
+        # 此实例已解析的路径: 名称 -> (值, 类别, 是否需要检查已创建的目录).
+        # 条目仅在完全解析后才会发布, 因此读取时无需加锁.
+        object.__setattr__(self, "_resolved_", {})
+
+        # Bumped by every assignment, a resolution that overlaps an assignment does not keep its entry.
+        # 每次赋值都会递增, 与赋值重叠的解析不会保留其条目.
+        object.__setattr__(self, "_generation_", 0)
+        return self
+
+
     def __getattribute__(self, __name: str) -> Any:
-        value = super().__getattribute__(__name)
+        if type(self)._dispatch_.get(__name, None) == _PASSTHROUGH:
+            return object.__getattribute__(self, __name)
+
+        entry = object.__getattribute__(self, "_resolved_").get(__name, None)
+
+        if entry is not None and (not entry[2] or entry[0] in _created_directories):
+            return entry[0]
+
+        return _resolve_once(self, __name, True)[0]
+
+
+    def __setattr__(self, __name: str, __value: Any) -> None:
+        # Any assignment may change how paths resolve, such as _include_ or _makedirs_.
+        # The lock of the name keeps a running resolution of it from overwriting the new value,
+        # internal names are never written by a resolution and need no lock.
+        # 任何赋值都可能改变路径的解析结果, 例如 _include_ 或 _makedirs_.
+        # 该名称的锁可防止正在进行的解析覆盖新值, 内部名称不会被解析写入, 因此无需加锁.
+        if _internal(__name):
+            _assign(self, __name, __value)
+            return
+
+        with _lock(self, __name):
+            _assign(self, __name, __value)
+
+
+    def _materialize_(self) -> Mapping[str, str]:
+        """
+        ## Materialize the directory tree
+        ## 实体化目录树
+
+        Resolve every declared path at once and create all needed directories in one parent-first pass.
+
+        一次性解析所有声明的路径, 并按父目录优先的顺序一次创建所有需要的目录.
+
+        ```TEXT
+        return:
+            Mapping[str, str]
+            Read-only flat map from dotted attribute names to their final paths, such as "cache.tmp".
+            从点分属性名到最终路径的只读扁平映射, 例如 "cache.tmp".
+        ```
+        """
+        paths = {}
+        directories = []
+        _collect(self, "", paths, directories)
+        _makedirs_many(directories)
+        return types.MappingProxyType(paths)
+
+
+    def _inventory_(self, workers: int = 0, full: bool = False) -> dict[str, "Inventory"]:
+        """
+        ## Directory inventory
+        ## 目录清单
+
+        Refresh the shared index of this directory and report every declared subdirectory.
+
+        刷新此目录的共享索引并报告每个声明的子目录.
+
+        ```TEXT
+        args:
+            workers: Number of threads used to scan subtrees in parallel, 0 scans in the calling thread.
+                     并行扫描子树使用的线程数, 为 0 时在调用线程中扫描.
+
+            full: Rescan every directory, see `DirectoryIndex.refresh`.
+                  重新扫描所有目录, 参见 `DirectoryIndex.refresh`.
+
+        return:
+            dict[str, Inventory]
+            Inventory of each declared subdirectory keyed by dotted attribute name, "" is the directory itself.
+            以点分属性名为键的每个声明子目录的清单, "" 表示目录自身.
+        ```
+        """
+        paths = {}
+        _collect(self, "", paths, [])
+
+        index = get_index(self)
+        result = {"": index.refresh(workers, full)}
+
+        for name, path in paths.items():
+            if not isinstance(path, FinalFilePath):
+                result[name] = index.inventory(path)
+
+        return result
+
+
+
+def _assign(directory: Directory, name: str, value: Any) -> None:
+    object.__setattr__(directory, name, value)
+    object.__setattr__(directory, "_generation_", object.__getattribute__(directory, "_generation_") + 1)
+    object.__getattribute__(directory, "_resolved_").clear()
+
+
+def _classify(name: str, value: Any) -> int:
+    if _internal(name):
+        return _PASSTHROUGH
+
+    if isinstance(value, type):
+        return _NESTED if issubclass(value, Directory) else _PASSTHROUGH
+
+    if isinstance(value, Directory):
+        return _NESTED
+
+    if isinstance(value, (FilePath, FinalFilePath)):
+        return _FILE
+
+    if isinstance(value, str):
+        return _DIRECTORY
+
+    return _PASSTHROUGH
+
+
+def _getattr_static(cls: type, name: str) -> Any:
+    """Like inspect.getattr_static for class attributes, without importing inspect."""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+
+    return getattr(cls, name, None)
+
+
+def _build_dispatch(cls: type) -> dict[str, int]:
+    return {name: _classify(name, _getattr_static(cls, name)) for name in dir(cls)}
 
-        if not isinstance(value, str) and not inspect.isclass(value):
-            return value
 
-        if __name.startswith("_") and __name.endswith("_"):
-            return value
+def _resolve(directory: Directory, name: str) -> tuple[Any, int]:
+    """Resolve an attribute of a directory, returns the value and its kind."""
+    value = object.__getattribute__(directory, name)
+    kind = _classify(name, value)
 
-        by_numlinka = True
+    if kind == _PASSTHROUGH:
+        return value, kind
 
-        if inspect.isclass(value):
-            if not issubclass(value, Directory):
-                return value
+    if isinstance(value, type):
+        csname = value._value_ if value._value_ and isinstance(value._value_, str) else value.__name__
+        target = os.path.join(directory, csname) if directory._include_ else csname
+        new_value = value(target)
+        new_value._value_ = csname
+        object.__setattr__(directory, name, new_value)
+        return new_value, kind
 
-            csname = value._value_ if value._value_ and isinstance(value._value_, str) else value.__name__
-            target = os.path.join(self, csname) if self._include_ else csname
-            new_value = value(target)
-            new_value._value_ = csname
-            super().__setattr__(__name, new_value)
-            result = new_value
+    elif isinstance(value, (FinalFilePath, FinalDirectoryPath)):
+        return value, kind
 
-        elif isinstance(value, FinalFilePath):
-            return value
+    elif isinstance(value, FilePath):
+        target = os.path.join(directory, value) if directory._include_ else value
+        new_value = FinalFilePath(target)
+        object.__setattr__(directory, name, new_value)
+        return new_value, kind
 
-        elif isinstance(value, FinalDirectoryPath):
-            result = value
+    elif isinstance(value, Directory):
+        if not isinstance(value._value_, str):
+            value._value_ = value
 
-        elif isinstance(value, FilePath):
-            target = os.path.join(self, value) if self._include_ else value
-            new_value = FinalFilePath(target)
-            super().__setattr__(__name, new_value)
-            return new_value
+        orname = value._value_
+        target = os.path.join(directory, orname) if directory._include_ else value
 
-        elif isinstance(value, Directory):
-            if not isinstance(value._value_, str):
-                value._value_ = value
+        if value == target:
+            return value, kind
 
-            orname = value._value_
-            target = os.path.join(self, orname) if self._include_ else value
+        class_ = type(value)
+        new_value = class_(target)
+        new_value._value_ = orname
+        object.__setattr__(directory, name, new_value)
+        return new_value, kind
 
-            if value == target:
-                result = value
+    else:
+        target = os.path.join(directory, value) if directory._include_ else value
+        new_value = FinalDirectoryPath(target)
+        object.__setattr__(directory, name, new_value)
+        return new_value, kind
+
+
+def _resolve_once(directory: Directory, name: str, create: bool) -> tuple[Any, int]:
+    """Resolve an attribute under its own lock, concurrent first accesses resolve it exactly once."""
+    # Internal names always pass through, so they are read without a lock.
+    # 内部名称总是直接透传, 因此读取时无需加锁.
+    if _internal(name):
+        return object.__getattribute__(directory, name), _PASSTHROUGH
+
+    resolved = object.__getattribute__(directory, "_resolved_")
+
+    with _lock(directory, name):
+        entry = resolved.get(name, None)
+        generation = object.__getattribute__(directory, "_generation_")
+
+        if entry is None:
+            result, kind = _resolve(directory, name)
+
+            if kind == _PASSTHROUGH:
+                return result, kind
+
+            entry = (result, kind, kind != _FILE and directory._makedirs_)
+
+        result, kind, makedirs = entry
+
+        if create and makedirs:
+            _makedirs(result)
+
+        resolved[name] = entry
+
+        # An assignment bumps the generation before clearing, so either its clear removes this entry
+        # or the check below sees the new generation and withdraws it.
+        # 赋值先递增代数再清空, 因此要么其清空会移除此条目, 要么下面的检查会看到新的代数并撤回它.
+        if object.__getattribute__(directory, "_generation_") != generation and resolved.get(name, None) is entry:
+            del resolved[name]
+
+        return result, kind
+
+
+def _collect(directory: Directory, prefix: str, paths: dict[str, str], directories: list[str]) -> None:
+    """Resolve the declared paths of a directory tree without creating anything."""
+    makedirs = directory._makedirs_
+    dispatch = type(directory)._dispatch_
+
+    for name in dir(directory):
+        # Methods and special names are known from the dispatch table and never need a lock.
+        # 方法和特殊名称已由分派表确定, 无需加锁.
+        if dispatch.get(name, None) == _PASSTHROUGH or (name.startswith("_") and name.endswith("_")):
+            continue
+
+        result, kind = _resolve_once(directory, name, False)
+
+        if kind == _PASSTHROUGH:
+            continue
+
+        paths[prefix + name] = result
+
+        if kind != _FILE and makedirs:
+            directories.append(result)
+
+        if kind == _NESTED:
+            _collect(result, f"{prefix}{name}.", paths, directories)
+
+
+def _makedirs_many(paths: list[str]) -> None:
+    """Create directories parent-first, a directory whose parent is known to exist costs a single mkdir."""
+    existing = set()
+
+    for path in sorted(set(paths), key=lambda item: (item.count(os.sep), item)):
+        if path in _created_directories:
+            existing.add(path)
+            continue
+
+        parent = os.path.dirname(path)
+
+        try:
+            if not parent or parent in existing or parent in _created_directories:
+                os.mkdir(path)
 
             else:
-                class_ = type(value)
-                new_value = class_(target)
-                new_value._value_ = orname
-                super().__setattr__(__name, new_value)
-                result = new_value
-
-        elif isinstance(value, str):
-            target = os.path.join(self, value) if self._include_ else value
-            new_value = FinalDirectoryPath(target)
-            super().__setattr__(__name, new_value)
-            result = new_value
+                os.makedirs(path, exist_ok=True)
+
+        except FileExistsError as _:
+            if not os.path.isdir(path):
+                continue
+
+        except OSError as _:
+            continue
+
+        existing.add(parent)
+        existing.add(path)
+        _created_directories.add(str.__str__(path))
+
+
+class Inventory (NamedTuple):
+    """Totals of a directory subtree, mtimes are in seconds and None when there are no files."""
+    files: int
+    size: int
+    oldest: float | None
+    newest: float | None
+
+
+_EMPTY_INVENTORY = Inventory(0, 0, None, None)
+
+# A directory modified this recently may still change within the same mtime tick, so it is rescanned next time.
+# 最近修改的目录可能在同一个 mtime 刻度内继续变化, 因此下次仍会重新扫描.
+_STABLE_NS = 2 * 10 ** 9
+
+
+class _IndexEntry (object):
+    def __init__(self, mtime_ns: int, stable: bool):
+        self.mtime_ns = mtime_ns
+        self.stable = stable
+        self.subdirs = []
+        self.files = 0
+        self.size = 0
+        self.oldest = None
+        self.newest = None
+        self.total = _EMPTY_INVENTORY
+
+        # Serial of the refresh that listed the directory.
+        # 列出该目录的那次刷新的序号.
+        self.serial = 0
+
+        # (name, size, mtime, atime) of each file, only kept by indexes that keep files.
+        # 每个文件的 (名称, 大小, mtime, atime), 仅由保留文件信息的索引保存.
+        self.items = None
+
+
+def _merge(inventories: list[Inventory]) -> Inventory:
+    oldest = [item.oldest for item in inventories if item.oldest is not None]
+    newest = [item.newest for item in inventories if item.newest is not None]
+
+    return Inventory(
+        sum(item.files for item in inventories),
+        sum(item.size for item in inventories),
+        min(oldest) if oldest else None,
+        max(newest) if newest else None
+    )
+
+
+class DirectoryIndex (object):
+    """
+    ## Directory index
+    ## 目录索引
+
+    Incremental inventory of a directory tree built on os.scandir,
+    a directory is only listed again when its own mtime has changed.
+
+    基于 os.scandir 的目录树增量清单,
+    仅当目录自身的 mtime 改变时才会重新列出该目录.
+    """
+
+    def __init__(self, root: str, keep_files: bool = False):
+        self.root = os.path.normpath(root)
+        self.keep_files = keep_files
+        self.__lock = threading.Lock()
+        self.__entries = {}
+
+        # (serial, paths) of the directories rescanned or dropped by each refresh, see `changes`.
+        # 每次刷新重新扫描或移除的目录 (序号, 路径), 参见 `changes`.
+        self.__serial = 0
+        self.__floor = 0
+        self.__log = []
+        self.__logged = 0
+
+
+    def refresh(self, workers: int = 0, full: bool = False) -> Inventory:
+        """
+        ## Refresh the index
+        ## 刷新索引
+
+        Each directory costs one stat, only changed directories are listed again.
+        Content changes of existing files do not touch the directory mtime, use full to pick them up.
+
+        每个目录只需一次 stat, 仅重新列出发生变化的目录.
+        已有文件的内容变化不会改变目录的 mtime, 可使用 full 以获取这些变化.
+
+        ```TEXT
+        args:
+            workers: Number of threads used to scan the subtrees of the root in parallel.
+                     并行扫描根目录各子树使用的线程数.
+
+            full: Rescan every directory.
+                  重新扫描所有目录.
+
+        return:
+            Inventory
+            Totals of the whole tree.
+            整个目录树的合计.
+        ```
+        """
+        with self.__lock:
+            visited = set()
+            rescanned = []
+
+            if workers > 0:
+                entry = self.__scan_entry(self.root, full, visited, rescanned)
+
+                if entry is None:
+                    total = _EMPTY_INVENTORY
+
+                else:
+                    import concurrent.futures
+
+                    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                        futures = [executor.submit(self.__scan, path, full, visited, rescanned) for path in entry.subdirs]
+                        subtotals = [future.result() for future in futures]
+
+                    total = self.__total(entry, subtotals)
+
+            else:
+                total = self.__scan(self.root, full, visited, rescanned)
+
+            dropped = [path for path in self.__entries if path not in visited]
+
+            for path in dropped:
+                del self.__entries[path]
+
+            if rescanned or dropped:
+                self.__record(rescanned, dropped)
+
+            return total
+
+
+    def changes(self, since: int) -> tuple[int, list[str] | None]:
+        """
+        ## Get changed directories
+        ## 获取变化的目录
+
+        Directories rescanned or dropped by the refreshes after the serial since,
+        lets a consumer of the index update only what changed instead of walking every file again.
+
+        在序号 since 之后的刷新中被重新扫描或移除的目录,
+        使索引的使用者只需更新变化的部分, 而不必再次遍历所有文件.
+
+        ```TEXT
+        args:
+            since: Serial returned by a previous call, -1 when there is none.
+                   上一次调用返回的序号, 没有时为 -1.
+
+        return:
+            tuple[int, list[str] | None]
+            The current serial and the changed directories,
+            None when the history does not reach back to since and everything has to be read again.
+            当前序号与变化的目录,
+            当历史记录无法追溯到 since 时为 None, 需要重新读取全部内容.
+        ```
+        """
+        with self.__lock:
+            if since < self.__floor:
+                return self.__serial, None
+
+            paths = []
+
+            for serial, items in reversed(self.__log):
+                if serial <= since:
+                    break
+
+                paths += items
+
+            return self.__serial, list(dict.fromkeys(paths))
+
+
+    def _listings(self, paths: list[str] | None = None) -> Iterator[tuple[str, int, list[tuple[str, int, float, float]]]]:
+        """(path, serial, files) of the given directories that are indexed, of every directory when paths is None."""
+        entries = self.__entries
+
+        for path in entries.copy() if paths is None else paths:
+            entry = entries.get(path, None)
+
+            if entry is not None and entry.items is not None:
+                yield path, entry.serial, entry.items
+
+
+    def __record(self, rescanned: list[str], dropped: list[str]) -> None:
+        self.__serial += 1
+
+        for path in rescanned:
+            self.__entries[path].serial = self.__serial
+
+        self.__log.append((self.__serial, rescanned + dropped))
+        self.__logged += len(rescanned) + len(dropped)
+
+        # The history is kept at about twice the size of the index, older consumers read everything again.
+        # 历史记录保持在索引大小的两倍左右, 更旧的使用者需要重新读取全部内容.
+        while len(self.__log) > 1 and self.__logged > 2 * len(self.__entries) + 64:
+            serial, paths = self.__log.pop(0)
+            self.__floor = serial
+            self.__logged -= len(paths)
+
+
+    def inventory(self, path: str | None = None) -> Inventory:
+        """
+        ## Get inventory
+        ## 获取清单
+
+        Totals of a subtree as of the last refresh, empty when the path was not found.
+
+        上次刷新时某个子树的合计, 未找到该路径时为空.
+        """
+        entry = self.__entries.get(self.root if path is None else os.path.normpath(path), None)
+        return _EMPTY_INVENTORY if entry is None else entry.total
+
+
+    def iter_files(self, path: str | None = None, before: float | None = None) -> Iterator[tuple[str, int, float, float]]:
+        """
+        ## Iterate indexed files
+        ## 遍历已索引的文件
+
+        Yields (path, size, mtime, atime) of the files of a subtree as of the last refresh, without any syscall.
+        With before, directories whose oldest file is not older than it are skipped.
+        Requires an index that keeps files.
+
+        产出上次刷新时某个子树中文件的 (路径, 大小, mtime, atime), 不产生任何系统调用.
+        指定 before 时, 跳过最旧文件不早于它的目录.
+        需要保留文件信息的索引.
+        """
+        if not self.keep_files:
+            raise ValueError("The index does not keep files.")
+
+        entries = self.__entries
+        pending = [self.root if path is None else os.path.normpath(path)]
+
+        while pending:
+            dirpath = pending.pop()
+            entry = entries.get(dirpath, None)
+
+            if entry is None:
+                continue
+
+            pending.extend(entry.subdirs)
+
+            if entry.items is None or (before is not None and (entry.oldest is None or entry.oldest >= before)):
+                continue
+
+            for name, size, mtime, atime in entry.items:
+                yield os.path.join(dirpath, name), size, mtime, atime
+
+
+    def __scan_entry(self, path: str, full: bool, visited: set[str], rescanned: list[str]) -> _IndexEntry | None:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+
+        except OSError as _:
+            return None
+
+        visited.add(path)
+        entry = self.__entries.get(path, None)
+
+        keep_files = self.keep_files
+
+        if not full and entry is not None and entry.stable and entry.mtime_ns == mtime_ns:
+            if not keep_files or entry.items is not None:
+                return entry
+
+        entry = _IndexEntry(mtime_ns, time.time_ns() - mtime_ns > _STABLE_NS)
+
+        if keep_files:
+            entry.items = []
+
+        try:
+            with os.scandir(path) as iterator:
+                for item in iterator:
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            entry.subdirs.append(item.path)
+                            continue
+
+                        stat = item.stat(follow_symlinks=False)
+
+                    except OSError as _:
+                        continue
+
+                    entry.files += 1
+                    entry.size += stat.st_size
+
+                    if entry.oldest is None or stat.st_mtime < entry.oldest:
+                        entry.oldest = stat.st_mtime
+
+                    if entry.newest is None or stat.st_mtime > entry.newest:
+                        entry.newest = stat.st_mtime
+
+                    if keep_files:
+                        entry.items.append((item.name, stat.st_size, stat.st_mtime, stat.st_atime))
+
+        except OSError as _:
+            return None
+
+        self.__entries[path] = entry
+        rescanned.append(path)
+        return entry
+
+
+    def __scan(self, path: str, full: bool, visited: set[str], rescanned: list[str]) -> Inventory:
+        entry = self.__scan_entry(path, full, visited, rescanned)
+
+        if entry is None:
+            return _EMPTY_INVENTORY
+
+        subtotals = [self.__scan(subdir, full, visited, rescanned) for subdir in entry.subdirs]
+        return self.__total(entry, subtotals)
+
+
+    def __total(self, entry: _IndexEntry, subtotals: list[Inventory]) -> Inventory:
+        entry.total = _merge([Inventory(entry.files, entry.size, entry.oldest, entry.newest)] + subtotals)
+        return entry.total
+
+
+# Shared indexes keyed by normalized root path.
+# 以规范化根路径为键的共享索引.
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str, keep_files: bool = False) -> DirectoryIndex:
+    """
+    ## Get directory index
+    ## 获取目录索引
+
+    Returns the shared index of a root path, it is created on first use.
+    Requesting keep_files upgrades an existing index, its directories are listed again on the next refresh.
+
+    返回某个根路径的共享索引, 首次使用时创建.
+    请求 keep_files 时会升级已有的索引, 其目录将在下次刷新时重新列出.
+    """
+    key = os.path.normpath(root)
+
+    with _indexes_lock:
+        index = _indexes.get(key, None)
+
+        if index is None:
+            index = _indexes[key] = DirectoryIndex(key, keep_files)
+
+        elif keep_files:
+            index.keep_files = True
+
+        return index
+
+
+class RetentionPolicy (NamedTuple):
+    """
+    ## Retention policy
+    ## 保留策略
+
+    Limits of a directory subtree, declared as the `_retention_` attribute of a `Directory`.
+    Files are evicted least recently used first, by "mtime" or "atime" according to order.
+    max_age is in seconds and always measured by mtime.
+
+    目录子树的限制, 声明为 `Directory` 的 `_retention_` 属性.
+    文件按最近最少使用的顺序淘汰, 根据 order 使用 "mtime" 或 "atime".
+    max_age 以秒为单位, 总是按 mtime 计算.
+    """
+    max_bytes: int | None = None
+    max_files: int | None = None
+    max_age: float | None = None
+    order: str = "mtime"
+
+
+class _Candidates (object):
+    """Eviction heap of one policy, kept across cycles and updated from the changes of its index."""
+
+    def __init__(self, index: DirectoryIndex, position: int):
+        self.index = index
+        self.position = position
+        self.serial = -1
+
+        # (key, path, size, directory, serial), entries whose directory serial is outdated are skipped when popped.
+        # (键, 路径, 大小, 目录, 序号), 目录序号已过时的条目在弹出时被跳过.
+        self.heap = []
+        self.serials = {}
+        self.files = 0
+
+
+    def update(self, batch: int) -> None:
+        self.serial, paths = self.index.changes(self.serial)
+
+        if paths is None:
+            self.heap = []
+            self.serials = {}
+            self.files = 0
 
         else:
-            return value
+            for path in paths:
+                self.files -= self.serials.pop(path, (0, 0))[1]
+
+        position = self.position
+        heap = self.heap
+
+        for dirpath, serial, items in self.index._listings(paths):
+            self.serials[dirpath] = (serial, len(items))
+            self.files += len(items)
 
-        if self._makedirs_:
+            for item in items:
+                heapq.heappush(heap, (item[position], os.path.join(dirpath, item[0]), item[1], dirpath, serial))
+
+        # Outdated entries are dropped once they outnumber the live ones.
+        # 过时的条目多于有效条目时将其丢弃.
+        if len(heap) > 2 * self.files + batch:
+            serials = self.serials
+            self.heap = [item for item in heap if item[3] in serials and serials[item[3]][0] == item[4]]
+            heapq.heapify(self.heap)
+
+
+    def live(self, item: tuple[float, str, int, str, int]) -> bool:
+        current = self.serials.get(item[3], None)
+        return current is not None and current[0] == item[4]
+
+
+
+class Evictor (object):
+    """
+    ## Evictor
+    ## 淘汰器
+
+    Enforces the retention policies declared in a directory tree, on demand with `enforce`
+    or periodically in a background thread with `start`.
+
+    执行目录树中声明的保留策略, 可通过 `enforce` 按需执行,
+    或通过 `start` 在后台线程中周期性执行.
+
+    ```TEXT
+    args:
+        directory: Root of the tree, the root and every nested Directory may declare _retention_.
+                   目录树的根, 根目录及每个嵌套的 Directory 都可以声明 _retention_.
+
+        interval: Seconds between two background cycles.
+                  两次后台执行之间的秒数.
+
+        batch: Maximum number of files removed per policy and cycle,
+               the background thread runs the next cycle at once while a backlog remains.
+               每个策略每次执行最多删除的文件数量,
+               仍有积压时后台线程会立即执行下一次.
+    ```
+    """
+
+    def __init__(self, directory: Directory, interval: float = 60.0, batch: int = 1000):
+        if not isinstance(directory, Directory):
+            raise TypeError("The directory type is not Directory.")
+
+        if batch <= 0:
+            raise ValueError("The batch must be a positive integer.")
+
+        self.directory = directory
+        self.interval = interval
+        self.batch = batch
+
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread = None
+        self.__backlog = False
+        self.__candidates = {}
+
+
+    def policies(self) -> list[tuple[str, RetentionPolicy]]:
+        """Every (path, policy) declared in the tree."""
+        paths = {}
+        _collect(self.directory, "", paths, [])
+
+        directories = [self.directory] + [path for path in paths.values() if isinstance(path, Directory)]
+        return [(path, path._retention_) for path in directories if path._retention_ is not None]
+
+
+    def enforce(self) -> list[str]:
+        """
+        ## Enforce the policies once
+        ## 执行一次策略
+
+        ```TEXT
+        return:
+            list[str]
+            Removed files.
+            已删除的文件.
+        ```
+        """
+        removed = []
+        backlog = False
+
+        with self.__lock:
+            for path, policy in self.policies():
+                result, more = self.__enforce(path, policy)
+                removed += result
+                backlog = backlog or more
+
+            self.__backlog = backlog
+
+        return removed
+
+
+    def __enforce(self, path: str, policy: RetentionPolicy) -> tuple[list[str], bool]:
+        if policy.order not in ("mtime", "atime"):
+            raise ValueError("The order must be \"mtime\" or \"atime\".")
+
+        index = get_index(path, keep_files=True)
+        total = index.refresh()
+        removed = []
+
+        # Expired files, directories without old enough files are skipped by the index.
+        # 过期文件, 没有足够旧文件的目录会被索引跳过.
+        if policy.max_age is not None:
+            cutoff = time.time() - policy.max_age
+
+            for filepath, size, mtime, _ in index.iter_files(before=cutoff):
+                if len(removed) >= self.batch:
+                    return removed, True
+
+                if mtime >= cutoff:
+                    continue
+
+                if _remove(filepath):
+                    removed.append(filepath)
+
+                # A file removed by someone else no longer counts against the limits either.
+                # 被其他人删除的文件同样不再计入限制.
+                elif os.path.lexists(filepath):
+                    continue
+
+                total = Inventory(total.files - 1, total.size - size, total.oldest, total.newest)
+
+        # The cheap check below is all a cycle costs while the tree stays within its limits.
+        # 目录树保持在限制内时, 每次执行只需下面的廉价检查.
+        if not _over_limits(policy, total.size, total.files):
+            return removed, False
+
+        # Only the directories rescanned since the previous cycle are read into the heap again.
+        # 只有自上次执行以来被重新扫描的目录会再次读入堆中.
+        position = 2 if policy.order == "mtime" else 3
+        candidates = self.__candidates.get(path, None)
+
+        if candidates is None or candidates.index is not index or candidates.position != position:
+            candidates = self.__candidates[path] = _Candidates(index, position)
+
+        candidates.update(self.batch)
+        heap = candidates.heap
+
+        size = total.size
+        files = total.files
+
+        # Files that could not be removed go back to the heap once the cycle ends, so the next cycle retries them.
+        # 无法删除的文件在本次执行结束后放回堆中, 以便下次执行重试.
+        failed = []
+        expired = set(removed)
+
+        try:
+            while heap and _over_limits(policy, size, files):
+                if len(removed) >= self.batch:
+                    return removed, True
+
+                item = heapq.heappop(heap)
+
+                if not candidates.live(item):
+                    continue
+
+                key, filepath, filesize, dirpath, serial = item
+
+                # The index may be stale, a file used since the last scan goes back with its fresh key
+                # and a file removed by someone else no longer counts against the limits.
+                # 索引可能已过期, 自上次扫描后被使用过的文件会以新的键放回,
+                # 被其他人删除的文件不再计入限制.
+                try:
+                    stat = os.stat(filepath)
+
+                except OSError as _:
+                    if os.path.lexists(filepath):
+                        failed.append(item)
+
+                    elif filepath not in expired:
+                        size -= filesize
+                        files -= 1
+
+                    continue
+
+                fresh = stat.st_mtime if position == 2 else stat.st_atime
+                if fresh > key:
+                    heapq.heappush(heap, (fresh, filepath, stat.st_size, dirpath, serial))
+                    continue
+
+                if _remove(filepath):
+                    removed.append(filepath)
+
+                elif os.path.lexists(filepath):
+                    failed.append(item)
+                    continue
+
+                size -= stat.st_size
+                files -= 1
+
+        finally:
+            for item in failed:
+                heapq.heappush(heap, item)
+
+        return removed, False
+
+
+    def start(self) -> None:
+        """Start enforcing the policies in a background daemon thread."""
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__run, name="dirstruct-evictor", daemon=True)
+        self.__thread.start()
+
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the background thread and wait for it."""
+        self.__stop_event.set()
+
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+
+    def __run(self) -> None:
+        while not self.__stop_event.is_set():
             try:
-                os.makedirs(result, exist_ok=by_numlinka)
+                self.enforce()
 
-            except OSError as _:
-                ...
+            except Exception as _:
+                self.__backlog = False
 
-        return result
+            if not self.__backlog:
+                self.__stop_event.wait(self.interval)
+
+
+def _over_limits(policy: RetentionPolicy, size: int, files: int) -> bool:
+    if policy.max_bytes is not None and size > policy.max_bytes:
+        return True
+
+    return policy.max_files is not None and files > policy.max_files
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+
+    except OSError as _:
+        return False
+
+    return True
+
+
+Directory._dispatch_ = _build_dispatch(Directory)
 
 
 __all__ = [
@@ -121,5 +1087,12 @@ __all__ = [
     "DirectoryPath",
     "FinalFilePath",
     "FinalDirectoryPath",
-    "Directory"
+    "Directory",
+    "Inventory",
+    "DirectoryIndex",
+    "get_index",
+    "RetentionPolicy",
+    "Evictor",
+    "invalidate",
+    "recheck"
 ]
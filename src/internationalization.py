@@ -4,15 +4,8 @@
 
 # std
 import os
+import time
 import threading
-from typing import Any
-
-# requirements
-try:
-    import strutils
-
-except ImportError as _:
-    from . import strutils
 
 
 __name__ = "internationalization"
@@ -20,14 +13,130 @@ __author__ = "numlinka"
 __license__ = "LGPL 3.0"
 __copyright__ = "Copyright (C) 2022 numlinka"
 
-__version_info__ = (1, 1, 1)
+__version_info__ = (1, 3, 2)
 __version__ = ".".join(map(str, __version_info__))
 
 
+_strutils_module = None
+
+
+def _strutils():
+    """strutils, and with it re, is only imported once a file is loaded or a string formatted."""
+    global _strutils_module
+
+    if _strutils_module is None:
+        # requirements
+        try:
+            import strutils
+
+        except ImportError as _:
+            from . import strutils
+
+        _strutils_module = strutils
+
+    return _strutils_module
+
+
 class I18nString (str): ...
 
 
 
+class I18nStatistics (object):
+    """
+    ## Lookup statistics
+    ## 查找统计
+
+    Counters and latency histograms collected by `Internationalization` when statistics are enabled.
+    It is not locked by itself, the owner updates and exports it while holding its own lock.
+
+    开启统计后由 `Internationalization` 收集的计数器与耗时直方图.
+    其自身不加锁, 由持有者在自己的锁内更新和导出.
+    """
+
+    # Latency buckets are powers of two in nanoseconds, the last bucket collects everything slower.
+    # 耗时桶以纳秒为单位按 2 的幂划分, 最后一个桶收集所有更慢的查找.
+    BUCKETS = 32
+
+    def __init__(self, capacity: int = 100):
+        if not isinstance(capacity, int) or capacity <= 0:
+            raise ValueError("The capacity must be a positive integer.")
+
+        self.capacity = capacity
+        self.reset()
+
+
+    def reset(self) -> None:
+        self.lookups = 0
+        self.hits = {}
+        self.base_fallbacks = 0
+        self.self_fallbacks = 0
+        self.missing = {}
+        self.latency = {
+            "locale": [0] * self.BUCKETS,
+            "base": [0] * self.BUCKETS,
+            "self": [0] * self.BUCKETS,
+        }
+
+
+    def record(self, source: str, locale: str, target: str, elapsed: int) -> None:
+        self.lookups += 1
+
+        match source:
+            case "locale":
+                self.hits[locale] = self.hits.get(locale, 0) + 1
+
+            case "base":
+                self.hits[locale] = self.hits.get(locale, 0) + 1
+                self.base_fallbacks += 1
+
+            case "self":
+                self.self_fallbacks += 1
+                self.record_missing(target)
+
+        index = min(elapsed.bit_length(), self.BUCKETS - 1)
+        self.latency[source][index] += 1
+
+
+    def record_missing(self, target: str) -> None:
+        # Space-saving top-N: when full, the least counted key is replaced and its count is inherited,
+        # so memory stays bounded while frequent keys are never evicted by rare ones.
+        # Space-saving 算法: 已满时替换计数最少的键并继承其计数, 内存有界且高频键不会被低频键挤出.
+        missing = self.missing
+
+        if target in missing:
+            missing[target] += 1
+            return
+
+        if len(missing) < self.capacity:
+            missing[target] = 1
+            return
+
+        victim = min(missing, key=missing.__getitem__)
+        missing[target] = missing.pop(victim) + 1
+
+
+    def export(self, top: int = ...) -> dict:
+        top = self.capacity if top is Ellipsis else top
+        missing = sorted(self.missing.items(), key=lambda item: item[1], reverse=True)[:top]
+
+        latency = {}
+        for source, buckets in self.latency.items():
+            latency[source] = {
+                (1 << index) if index < self.BUCKETS - 1 else -1: count
+                for index, count in enumerate(buckets) if count
+            }
+
+        return {
+            "lookups": self.lookups,
+            "hits": dict(self.hits),
+            "base_fallbacks": self.base_fallbacks,
+            "self_fallbacks": self.self_fallbacks,
+            "missing": dict(missing),
+            "latency_ns": latency,
+        }
+
+
+
 class Internationalization (object):
     __class_name__ = "Internationalization"
 
@@ -39,6 +148,8 @@ class Internationalization (object):
 
         self.__lang_table = {}
 
+        self.__stats = None
+
 
     def _con_set_lang(self, value: str) -> None:
         with self.__call_lock:
@@ -91,19 +202,79 @@ class Internationalization (object):
         return result
 
 
+    def _con_set_stats(self, enabled: bool = True, capacity: int = 100) -> None:
+        """
+        ## Enable or disable lookup statistics
+        ## 开启或关闭查找统计
+
+        ```TEXT
+        args:
+            enabled: Whether to collect statistics, disabling discards the collected data.
+                     是否收集统计, 关闭时丢弃已收集的数据.
+
+            capacity: Maximum number of distinct missing keys to track.
+                      最多跟踪的不同缺失键数量.
+        ```
+        """
+        with self.__call_lock:
+            self.__stats = I18nStatistics(capacity) if enabled else None
+
+
+    def _con_get_stats(self, top: int = ...) -> dict | None:
+        """
+        ## Export lookup statistics
+        ## 导出查找统计
+
+        ```TEXT
+        args:
+            top: Number of most frequent missing keys to export, defaults to all tracked keys.
+                 导出的最常见缺失键数量, 默认为全部已跟踪的键.
+
+        return:
+            dict | None
+            A plain dict snapshot of the statistics, None when statistics are disabled.
+            Latency buckets are keyed by their upper bound in nanoseconds, -1 means unbounded.
+            统计的普通 dict 快照, 未开启统计时返回 None.
+            耗时桶以其纳秒上限为键, -1 表示无上限.
+        ```
+        """
+        with self.__call_lock:
+            if self.__stats is None:
+                return None
+
+            return self.__stats.export(top)
+
+
+    def _con_reset_stats(self) -> None:
+        with self.__call_lock:
+            if self.__stats is not None:
+                self.__stats.reset()
+
+
     def _con_get_value(self, target: str) -> I18nString:
         with self.__call_lock:
+            stats = self.__stats
+            if stats is not None:
+                start = time.perf_counter_ns()
 
-            table = self.__lang_table.get(self.__lang_setn, {})
+            locale = self.__lang_setn
+            source = "locale"
+            table = self.__lang_table.get(locale, {})
             result = table.get(target, None)
 
             if result is None:
-                table = self.__lang_table.get(self.__lang_base, {})
+                locale = self.__lang_base
+                source = "base" if self.__lang_setn and self.__lang_setn != locale else "locale"
+                table = self.__lang_table.get(locale, {})
                 result = table.get(target, None)
 
             if result is None:
+                source = "self"
                 result = self._con_get_self_value(target)
 
+            if stats is not None:
+                stats.record(source, locale, target, time.perf_counter_ns() - start)
+
             reply = I18nString(result)
             reply._set_attribute(self, target)
             return reply
@@ -163,6 +334,13 @@ class Internationalization (object):
         multiline_mode = False
         multiline_cont = ""
 
+        # Values are collected raw and decoded in one batch once the file is parsed,
+        # joining the raw lines of a multiline value decodes the same as joining the decoded lines.
+        # 值先以原始形式收集, 解析完文件后一次批量解码,
+        # 多行值的原始行连接后解码与逐行解码后再连接的结果相同.
+        keys = []
+        values = []
+
         for line in contents:
             if line.startswith("#define superiors "):
                 superiors = line.split("#define superiors ", 1)[1].split(" ")[0].strip()
@@ -185,13 +363,13 @@ class Internationalization (object):
                 if len(value) >= 2 and value.startswith('"') and value.endswith('"'):
                     value = value[1:-1]
 
-                value = strutils.escape_character_recognition(value)
                 multiline_cont += f"\n{value}"
 
                 if multiline_mode:
                     continue
 
-                self._con_add_value(type_, key, multiline_cont)
+                keys.append(key)
+                values.append(multiline_cont)
                 multiline_cont = ""
 
             else:
@@ -210,13 +388,15 @@ class Internationalization (object):
                 if len(value) >= 2 and value.startswith('"') and value.endswith('"'):
                     value = value[1:-1]
 
-                value = strutils.escape_character_recognition(value)
-
                 if multiline_mode:
                     multiline_cont = value
                     continue
 
-                self._con_add_value(type_, key, value)
+                keys.append(key)
+                values.append(value)
+
+        for key, value in zip(keys, _strutils().escape_decode_batch(values)):
+            self._con_add_value(type_, key, value)
 
 
     def _con_load_dir(self, path: str, type_: str = ..., superiors: str = ...) -> list[str]:
@@ -318,7 +498,7 @@ class Internationalization (object):
         return exception_list
 
 
-    def __getattribute__(self, __name: str) -> Any:
+    def __getattribute__(self, __name: str) -> object:
         superiors = super()
 
         # _con_ is identified by the action method, so it should not be overloaded.
@@ -356,18 +536,14 @@ class I18nString (str):
 
 
     def sformat(self, *args, **kwds):
-        result = self
-        for indexed, value in enumerate(args):
-            result = result.replace("{" + f"{indexed}" + "}", f"{value}")
-
-        for key, value in kwds.items():
-            result = result.replace("{" + f"{key}" + "}", f"{value}")
-
-        return result
+        # The plain str is cached so that the template cache does not keep this object alive.
+        # 缓存的是普通 str, 以免模板缓存使该对象无法释放.
+        return _strutils().format_template(str.__str__(self), *args, **kwds)
 
 
 
 __all__ = [
     "Internationalization",
+    "I18nStatistics",
     "I18nString"
 ]
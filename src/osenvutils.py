@@ -5,11 +5,11 @@
 # std
 import os
 import sys
-import locale
 import datetime
-import subprocess
+import weakref
+import threading
 import time as _time
-from typing import Any
+from collections.abc import Callable
 
 
 __name__ = "osenvutils"
@@ -17,11 +17,176 @@ __author__ = "numlinka"
 __license__ = "LGPL 3.0"
 __copyright__ = "Copyright (C) 2022 numlinka"
 
-__version_info__ = (1, 1, 4)
+__version_info__ = (1, 5, 4)
 __version__ = ".".join(map(str, __version_info__))
 
 
+class DateTimeFormatter (object):
+    """
+    ## Date time formatter
+    ## 日期时间格式化器
+
+    Formats without strftime, the date string is rendered again only when the day changes
+    and the time string only when the second changes.
+
+    不使用 strftime 进行格式化, 日期字符串仅在日期变化时重新生成,
+    时间字符串仅在秒数变化时重新生成.
+    """
+
+    def __init__(self):
+        # (key, text) pairs, replaced as a whole so that concurrent readers need no lock.
+        # (键, 文本) 对, 整体替换因此并发读取时无需加锁.
+        self.__date = (None, "")
+        self.__time = (None, "")
+
+
+    def date(self, now: datetime.datetime) -> str:
+        key = now.toordinal()
+        cached = self.__date
+
+        if cached[0] == key:
+            return cached[1]
+
+        text = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+        self.__date = (key, text)
+        return text
+
+
+    def time(self, now: datetime.datetime) -> str:
+        key = now.toordinal() * 86400 + now.hour * 3600 + now.minute * 60 + now.second
+        cached = self.__time
+
+        if cached[0] == key:
+            return cached[1]
+
+        text = f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+        self.__time = (key, text)
+        return text
+
+
+    def microsecond(self, now: datetime.datetime) -> str:
+        return f"{now.microsecond:06d}"
+
+
+    @staticmethod
+    def hex(value: int, upper: bool = False, simple: bool = False) -> str:
+        """Same results as hex() followed by the upper and replace chains of the old fields."""
+        if simple:
+            return f"{value:X}" if upper else f"{value:x}"
+
+        return f"{value:#X}".replace("X", "x", 1) if upper else f"{value:#x}"
+
+
+_FORMATTER = DateTimeFormatter()
+
+
+def _hex_field(source: str, upper: bool, simple: bool) -> Callable:
+    return lambda snapshot: DateTimeFormatter.hex(getattr(snapshot, source), upper, simple)
+
+
+# Field name -> function computing it from a snapshot, derived fields read the fields they build on.
+# 字段名 -> 由快照计算该字段的函数, 派生字段读取其所依赖的字段.
+_FIELDS = {
+    "date": lambda snapshot: _FORMATTER.date(snapshot.now),
+    "time": lambda snapshot: _FORMATTER.time(snapshot.now),
+    "microsecond": lambda snapshot: _FORMATTER.microsecond(snapshot.now),
+    "epoch": lambda snapshot: snapshot.now.timestamp(),
+    "timestamp": lambda snapshot: int(snapshot.epoch),
+    "timestamp_ms": lambda snapshot: int(snapshot.epoch * 10 ** 3),
+    "timestamp_us": lambda snapshot: int(snapshot.epoch * 10 ** 6),
+    "timetuple": lambda snapshot: snapshot.now.timetuple(),
+}
+
+for __source in ("timestamp", "timestamp_ms", "timestamp_us"):
+    for __simple in (False, True):
+        for __upper in (False, True):
+            __field = f"{__source}_hex{'_simple' if __simple else ''}{'_up' if __upper else ''}"
+            _FIELDS[__field] = _hex_field(__source, __upper, __simple)
+
+
+class _SnapshotField (object):
+    """Computes a snapshot field on first access and stores it on the instance, later reads skip the descriptor."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.function = _FIELDS[name]
+
+
+    def __get__(self, instance: object, owner: type | None = None) -> object:
+        if instance is None:
+            return self
+
+        value = self.function(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+
+class _VariableField (object):
+    """Reads a field from a snapshot of the variable."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+    def __get__(self, instance: object, owner: type | None = None) -> object:
+        if instance is None:
+            return self
+
+        return getattr(instance.snapshot(), self.name)
+
+
+class DateTimeSnapshot (object):
+    """
+    ## Date time snapshot
+    ## 日期时间快照
+
+    Every field is derived from the same instant, it is computed on first access and then cached.
+
+    所有字段都来自同一时刻, 在首次访问时计算, 之后被缓存.
+    """
+    date: str
+    time: str
+    microsecond: int
+    timestamp: int
+    timestamp_ms: int
+    timestamp_us: int
+
+    timetuple: _time.struct_time
+
+    timestamp_hex: str
+    timestamp_hex_up: str
+    timestamp_hex_simple: str
+    timestamp_hex_simple_up: str
+    timestamp_ms_hex: str
+    timestamp_ms_hex_up: str
+    timestamp_ms_hex_simple: str
+    timestamp_ms_hex_simple_up: str
+    timestamp_us_hex: str
+    timestamp_us_hex_up: str
+    timestamp_us_hex_simple: str
+    timestamp_us_hex_simple_up: str
+
+    # POSIX timestamp as float, computed once and shared by the timestamp fields.
+    # 浮点 POSIX 时间戳, 只计算一次并由各时间戳字段共享.
+    epoch: float
+
+
+    def __init__(self, now: datetime.datetime):
+        self.now = now
+
+
+
 class DateTimeVariable (object):
+    """
+    ## Date time variable
+    ## 日期时间变量
+
+    Each field access reads the current time, use `snapshot` to read several fields of one instant.
+    With a resolution in seconds the clock is cached, accesses within the same period share one snapshot.
+
+    每次访问字段都会读取当前时间, 使用 `snapshot` 读取同一时刻的多个字段.
+    设置以秒为单位的 resolution 后时钟会被缓存, 同一周期内的访问共享同一个快照.
+    """
     date: str
     time: str
     microsecond: int
@@ -44,70 +209,376 @@ class DateTimeVariable (object):
     timestamp_us_hex_simple: str
     timestamp_us_hex_simple_up: str
 
+    resolution = 0.0
+
+    # (monotonic expiry, snapshot) of the cached clock, replaced as a whole so readers need no lock.
+    # 缓存时钟的 (单调时钟过期时间, 快照), 整体替换因此读取时无需加锁.
+    _cached = None
+
+
+    def __init__(self, resolution: float = 0.0):
+        self.resolution = resolution
+
+
+    def snapshot(self) -> DateTimeSnapshot:
+        """
+        ## Take a snapshot
+        ## 获取快照
+
+        Capture one instant, all fields of the snapshot are derived from it.
+
+        捕获一个时刻, 快照的所有字段均由其得出.
+        """
+        if self.resolution <= 0:
+            return DateTimeSnapshot(datetime.datetime.now())
+
+        moment = _time.monotonic()
+        cached = self._cached
+
+        if cached is not None and moment < cached[0]:
+            return cached[1]
+
+        snapshot = DateTimeSnapshot(datetime.datetime.now())
+        self._cached = (moment + self.resolution, snapshot)
+        return snapshot
+
+
+for __field in _FIELDS:
+    setattr(DateTimeSnapshot, __field, _SnapshotField(__field))
+
+    if __field != "epoch":
+        setattr(DateTimeVariable, __field, _VariableField(__field))
+
+del __source, __simple, __upper, __field
+
+
+
+class Stopwatch (object):
+    """
+    ## Stopwatch
+    ## 秒表
+
+    Measures elapsed nanoseconds on time.perf_counter_ns, unaffected by wall clock adjustments.
+    It can be used as a context manager.
+
+    基于 time.perf_counter_ns 测量经过的纳秒数, 不受墙上时钟调整的影响.
+    可以作为上下文管理器使用.
+    """
+
+    def __init__(self, start: bool = True):
+        self.__elapsed = 0
+        self.__started = _time.perf_counter_ns() if start else None
+        self.__lap = self.__started
+
+
+    def start(self) -> None:
+        if self.__started is None:
+            self.__started = _time.perf_counter_ns()
+            self.__lap = self.__started
+
+
+    def stop(self) -> int:
+        """Stop and return the total elapsed nanoseconds."""
+        if self.__started is not None:
+            self.__elapsed += _time.perf_counter_ns() - self.__started
+            self.__started = None
+
+        return self.__elapsed
+
 
-    def __getattr__(self, __name: str) -> Any:
-        now = datetime.datetime.now()
+    def reset(self) -> None:
+        self.__elapsed = 0
+        self.__started = _time.perf_counter_ns() if self.__started is not None else None
+        self.__lap = self.__started
 
-        match __name:
-            case "date":
-                return now.strftime("%Y-%m-%d")
 
-            case "time":
-                return now.strftime("%H:%M:%S")
+    def elapsed(self) -> int:
+        """Total elapsed nanoseconds, including the running period."""
+        if self.__started is None:
+            return self.__elapsed
 
-            case "microsecond":
-                return now.strftime("%f")
+        return self.__elapsed + _time.perf_counter_ns() - self.__started
 
-            case "timestamp":
-                return int(now.timestamp())
 
-            case "timestamp_ms":
-                return int(now.timestamp() * 10 ** 3)
+    def lap(self) -> int:
+        """Nanoseconds since the previous lap or the start."""
+        now = _time.perf_counter_ns()
+        result = 0 if self.__lap is None else now - self.__lap
+        self.__lap = now
+        return result
 
-            case "timestamp_us":
-                return int(now.timestamp() * 10 ** 6)
 
-            case "timetuple":
-                return now.timetuple() 
+    def running(self) -> bool:
+        return self.__started is not None
 
-            case "timestamp_hex":
-                return hex(self.timestamp)
 
-            case "timestamp_hex_up":
-                return self.timestamp_hex.upper().replace("X", "x")
+    def __enter__(self) -> "Stopwatch":
+        self.reset()
+        self.start()
+        return self
 
-            case "timestamp_hex_simple":
-                return self.timestamp_hex.replace("0x", "")
 
-            case "timestamp_hex_simple_up":
-                return self.timestamp_hex_up.replace("0x", "")
+    def __exit__(self, *_) -> None:
+        self.stop()
 
-            case "timestamp_ms_hex":
-                return hex(self.timestamp_ms)
 
-            case "timestamp_ms_hex_up":
-                return self.timestamp_ms_hex.upper().replace("X", "x")
 
-            case "timestamp_ms_hex_simple":
-                return self.timestamp_ms_hex.replace("0x", "")
+# Histogram buckets keep the top 5 bits of a value, so each power of two is split into 16 buckets
+# and a reported value is at most about 6% above the recorded one.
+# 直方图桶保留数值的最高 5 位, 因此每个 2 的幂区间被分为 16 个桶,
+# 报告值最多比记录值高约 6%.
+_SUB_BUCKETS = 16
+_HISTOGRAM_BUCKETS = (64 - 4) * _SUB_BUCKETS
 
-            case "timestamp_ms_hex_simple_up":
-                return self.timestamp_ms_hex_up.replace("0x", "")
+# A shard holds the buckets followed by the count, the sum and the largest recorded value.
+# 分片依次保存各个桶, 数量, 总和以及记录到的最大值.
+_SHARD_COUNT = _HISTOGRAM_BUCKETS
+_SHARD_SUM = _HISTOGRAM_BUCKETS + 1
+_SHARD_MAX = _HISTOGRAM_BUCKETS + 2
+_SHARD_SIZE = _HISTOGRAM_BUCKETS + 3
 
-            case "timestamp_us_hex":
-                return hex(self.timestamp_us)
 
-            case "timestamp_us_hex_up":
-                return self.timestamp_us_hex.upper().replace("X", "x")
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKETS:
+        return value if value > 0 else 0
 
-            case "timestamp_us_hex_simple":
-                return self.timestamp_us_hex.replace("0x", "")
+    shift = value.bit_length() - 5
+    return (shift + 1) * _SUB_BUCKETS + ((value >> shift) & (_SUB_BUCKETS - 1))
 
-            case "timestamp_us_hex_simple_up":
-                return self.timestamp_us_hex_up.replace("0x", "")
 
-        raise AttributeError(__name)
+def _bucket_upper(index: int) -> int:
+    if index < _SUB_BUCKETS:
+        return index
 
+    shift = index // _SUB_BUCKETS - 1
+    mantissa = _SUB_BUCKETS + index % _SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class Histogram (object):
+    """
+    ## Histogram
+    ## 直方图
+
+    Fixed bucket histogram of nanosecond durations, each thread records into its own shard,
+    so recording takes no lock, the shards are only merged when reading.
+
+    纳秒耗时的固定桶直方图, 每个线程记录到自己的分片中,
+    因此记录时无需加锁, 仅在读取时合并分片.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__shards = []
+
+        # Shards of exited threads are folded into this one, so threads that come and go leave nothing behind.
+        # 已退出线程的分片会合并到这里, 因此来去的线程不会留下任何东西.
+        self.__folded = [0] * _SHARD_SIZE
+
+
+    def __shard(self) -> list[int]:
+        shard = [0] * _SHARD_SIZE
+        self.__local.shard = shard
+
+        # The thread local storage of a thread is dropped when it exits, and the sentinel with it.
+        # 线程退出时其线程局部存储会被丢弃, 哨兵对象也随之丢弃.
+        self.__local.sentinel = sentinel = _ShardSentinel()
+        weakref.finalize(sentinel, _fold_shard, weakref.ref(self), shard)
+
+        with self.__lock:
+            self.__shards.append(shard)
+
+        return shard
+
+
+    def _fold(self, shard: list[int]) -> None:
+        with self.__lock:
+            self.__shards.remove(shard)
+            _merge_shard(self.__folded, shard)
+
+
+    def record(self, value: int) -> None:
+        """Record a duration in nanoseconds."""
+        try:
+            shard = self.__local.shard
+
+        except AttributeError as _:
+            shard = self.__shard()
+
+        shard[_bucket_index(value) if value < 1 << 63 else _HISTOGRAM_BUCKETS - 1] += 1
+        shard[_SHARD_COUNT] += 1
+        shard[_SHARD_SUM] += value
+
+        if value > shard[_SHARD_MAX]:
+            shard[_SHARD_MAX] = value
+
+
+    def time(self) -> "Section":
+        """A context manager recording the duration of its block."""
+        return Section(self)
+
+
+    def reset(self) -> None:
+        with self.__lock:
+            for shard in [self.__folded] + self.__shards:
+                shard[:] = [0] * len(shard)
+
+
+    def merged(self) -> list[int]:
+        with self.__lock:
+            merged = self.__folded[:]
+
+            for shard in self.__shards:
+                _merge_shard(merged, shard)
+
+        return merged
+
+
+    def count(self) -> int:
+        return self.merged()[_SHARD_COUNT]
+
+
+    def percentile(self, percent: float, merged: list[int] | None = None) -> int:
+        """Upper bound in nanoseconds of the bucket holding the given percentile, 0 when empty."""
+        merged = self.merged() if merged is None else merged
+        total = merged[_SHARD_COUNT]
+
+        if total == 0:
+            return 0
+
+        threshold = max(1, -(-total * percent // 100))
+        cumulative = 0
+
+        for index in range(_HISTOGRAM_BUCKETS):
+            cumulative += merged[index]
+
+            if cumulative >= threshold:
+                return _bucket_upper(index)
+
+        return _bucket_upper(_HISTOGRAM_BUCKETS - 1)
+
+
+    def summary(self) -> dict[str, int | float]:
+        """
+        ## Summary
+        ## 摘要
+
+        A plain dict with count, mean, p50, p90, p99 and max, durations in nanoseconds.
+        The percentiles are bucket upper bounds, max is the largest recorded value.
+
+        包含 count, mean, p50, p90, p99 和 max 的普通 dict, 耗时以纳秒为单位.
+        各百分位数为桶的上界, max 为记录到的最大值.
+        """
+        merged = self.merged()
+        count = merged[_SHARD_COUNT]
+
+        return {
+            "count": count,
+            "mean": merged[_SHARD_SUM] / count if count else 0.0,
+            "p50": self.percentile(50, merged),
+            "p90": self.percentile(90, merged),
+            "p99": self.percentile(99, merged),
+            "max": merged[_SHARD_MAX],
+        }
+
+
+
+class _ShardSentinel (object):
+    """Lives in the thread local storage of a recording thread, its finalizer folds the shard of the thread."""
+
+
+def _fold_shard(ref: weakref.ref, shard: list[int]) -> None:
+    histogram = ref()
+
+    if histogram is not None:
+        histogram._fold(shard)
+
+
+def _merge_shard(target: list[int], shard: list[int]) -> None:
+    for index in range(_SHARD_MAX):
+        target[index] += shard[index]
+
+    target[_SHARD_MAX] = max(target[_SHARD_MAX], shard[_SHARD_MAX])
+
+
+
+class Section (object):
+    """Context manager recording the duration of a block into a histogram."""
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.started = 0
+
+
+    def __enter__(self) -> "Section":
+        self.started = _time.perf_counter_ns()
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self.histogram.record(_time.perf_counter_ns() - self.started)
+
+
+
+# Named histograms shared by `section` and `timing_report`.
+# 由 `section` 与 `timing_report` 共享的命名直方图.
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def get_histogram(name: str) -> Histogram:
+    """
+    ## Get named histogram
+    ## 获取命名直方图
+
+    Returns the shared histogram of a name, it is created on first use.
+
+    返回某个名称的共享直方图, 首次使用时创建.
+    """
+    histogram = _histograms.get(name, None)
+
+    if histogram is not None:
+        return histogram
+
+    with _histograms_lock:
+        return _histograms.setdefault(name, Histogram())
+
+
+def section(name: str) -> Section:
+    """
+    ## Section timer
+    ## 区段计时器
+
+    Time a block into the named histogram: `with section("db.query"): ...`
+
+    将代码块的耗时记录到命名直方图中: `with section("db.query"): ...`
+    """
+    return Section(get_histogram(name))
+
+
+def timing_report() -> dict[str, dict[str, int | float]]:
+    """
+    ## Timing report
+    ## 计时报告
+
+    Summaries of all named histograms, see `Histogram.summary`.
+
+    所有命名直方图的摘要, 参见 `Histogram.summary`.
+    """
+    with _histograms_lock:
+        histograms = dict(_histograms)
+
+    return {name: histogram.summary() for name, histogram in histograms.items()}
+
+
+
+# Linux sources of the system UUID, tried in order, product_uuid is usually readable by root only.
+# Linux 下系统 UUID 的来源, 按顺序尝试, product_uuid 通常仅 root 可读.
+_LINUX_UUID_FILES = (
+    "/sys/class/dmi/id/product_uuid",
+    "/etc/machine-id",
+)
 
 
 def get_system_uuid() -> str:
@@ -115,18 +586,32 @@ def get_system_uuid() -> str:
     ## get system UUID
     ## 获取系统 UUID
 
+    On Linux it is read from the DMI product UUID or the machine id without spawning a process.
+
+    Linux 下从 DMI product UUID 或 machine id 读取, 不会创建子进程.
+
     获取失败时返回一个空字符串
     """
     try:
         if sys.platform == "win32":
+            import subprocess
             result = subprocess.check_output("wmic csproduct get UUID", shell=True)
             bios_uuid = result.decode("utf-8").replace("UUID", "").strip()
             return bios_uuid
 
         elif sys.platform == "linux":
-            result = subprocess.check_output("dmidecode -s system-uuid", shell=True)
-            bios_uuid = result.decode("utf-8").strip()
-            return bios_uuid
+            for path in _LINUX_UUID_FILES:
+                try:
+                    with open(path, "r", encoding="utf-8") as fobj:
+                        bios_uuid = fobj.read().strip()
+
+                except OSError as _:
+                    continue
+
+                if bios_uuid:
+                    return bios_uuid
+
+            return ""
 
         elif sys.platform == "darwin":
             return ""
@@ -150,15 +635,49 @@ def get_locale_alias() -> str:
     return ors.split(".")[0]
 
 
-UUID = get_system_uuid()
-LOCALE_NAME = locale.getlocale()[0]
-LOCALE_ALIAS = get_locale_alias()
-ENCODING = locale.getencoding()
+def _get_locale_name() -> str | None:
+    import locale
+    return locale.getlocale()[0]
+
+
+def _get_encoding() -> str:
+    import locale
+    return locale.getencoding()
+
+
+# These module variables are computed on first access and then stored as ordinary globals,
+# locale is imported by then as well, it pulls in re and enum.
+# 这些模块变量在首次访问时计算, 之后作为普通全局变量保存,
+# locale 也在此时才导入, 它会引入 re 和 enum.
+_LAZY_VARIABLES = {
+    "UUID": get_system_uuid,
+    "LOCALE_NAME": _get_locale_name,
+    "LOCALE_ALIAS": get_locale_alias,
+    "ENCODING": _get_encoding,
+}
+
+
+def __getattr__(__name: str) -> object:
+    function = _LAZY_VARIABLES.get(__name, None)
+
+    if function is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {__name!r}")
+
+    value = function()
+    globals()[__name] = value
+    return value
 
 
+# The lazy variables are left out so that a star import does not compute them, import them by name.
+# 延迟变量不在其中, 以免星号导入计算它们, 请按名称导入.
 __all__ = [
-    "UUID",
-    "LOCALE_NAME",
-    "LOCALE_ALIAS",
-    "ENCODING"
+    "DateTimeFormatter",
+    "DateTimeSnapshot",
+    "DateTimeVariable",
+    "Stopwatch",
+    "Histogram",
+    "Section",
+    "get_histogram",
+    "section",
+    "timing_report"
 ]
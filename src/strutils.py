@@ -2,16 +2,43 @@
 # simplepylibs by numlinka.
 # strutils
 
+# std
+import re
+import functools
+from typing import Iterable, Iterator, Mapping
+
 
 __name__ = "strutils"
 __author__ = "numlinka"
 __license__ = "LGPL 3.0"
 __copyright__ = "Copyright (C) 2022 numlinka"
 
-__version_info__ = (1, 0, 1)
+__version_info__ = (1, 4, 1)
 __version__ = ".".join(map(str, __version_info__))
 
 
+_ESCAPE_TABLE = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "\\": "\\",
+}
+
+# Only known escapes are matched, unknown escapes and a trailing backslash are kept as they are.
+# Matching is left to right without overlap, so "\\\\n" is an escaped backslash followed by "n".
+# 只匹配已知的转义, 未知的转义和末尾的反斜杠保持原样.
+# 匹配从左到右且不重叠, 因此 "\\\\n" 是转义的反斜杠后跟 "n".
+_ESCAPE_PATTERN = re.compile(r"\\([ntr\\])")
+
+# Stand-in for escaped backslashes, the regex is used when the value already contains it.
+# 转义反斜杠的占位符, 当值中已包含它时使用正则表达式.
+_PLACEHOLDER = "\x00"
+
+
+def _escape_replace(match: re.Match) -> str:
+    return _ESCAPE_TABLE[match.group(1)]
+
+
 def escape_character_recognition(value: str) -> str:
     """
     ## escape character recognition
@@ -22,43 +49,410 @@ def escape_character_recognition(value: str) -> str:
 
     找到字符串中的转义字符并替换为其对应的特殊字符.
     """
-    table = {
-        "n": "\n",
-        "t": "\t",
-        "r": "\r",
-        "\\": "\\",
-    }
+    if "\\" not in value:
+        return value
+
+    # Escaped backslashes are parked on a placeholder first, so the remaining
+    # escapes can be replaced by plain C level passes without ambiguity.
+    # 先将转义的反斜杠替换为占位符, 剩余的转义即可无歧义地用 C 层面的替换完成.
+    if _PLACEHOLDER in value:
+        return _ESCAPE_PATTERN.sub(_escape_replace, value)
+
+    result = value.replace("\\\\", _PLACEHOLDER)
+    result = result.replace("\\n", "\n").replace("\\t", "\t").replace("\\r", "\r")
+    return result.replace(_PLACEHOLDER, "\\")
+
+
+# Default table of the configurable codec, numeric escapes are handled separately.
+# 可配置编解码器的默认转义表, 数值转义单独处理.
+ESCAPE_TABLE = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "0": "\0",
+    '"': '"',
+    "\\": "\\",
+}
+
+# Joins the values of a batch so that they are decoded by a single substitution.
+# 连接批量中的值, 以便通过一次替换完成解码.
+_BATCH_SEPARATOR = "\x1e"
+
+# Number of values decoded together by the streaming decoder.
+# 流式解码器每次一起解码的值的数量.
+_STREAM_CHUNK = 4096
+
+# Numeric escapes and the number of hex digits they take.
+# 数值转义及其所需的十六进制位数.
+_NUMERIC_ESCAPES = {
+    "x": 2,
+    "u": 4,
+    "U": 8,
+}
+
+
+class EscapeCodec (object):
+    """
+    ## Escape codec
+    ## 转义编解码器
+
+    A decoder and encoder compiled from one escape table,
+    obtain it with `get_escape_codec` so that each distinct table is compiled only once.
+
+    由一个转义表编译而成的解码器与编码器,
+    请通过 `get_escape_codec` 获取, 以便每个不同的转义表只编译一次.
+    """
+
+    def __init__(self, table: Mapping[str, str], numeric: bool = True):
+        for key, value in table.items():
+            if not isinstance(key, str) or len(key) != 1:
+                raise ValueError("The escape table keys must be single characters.")
+
+            if not isinstance(value, str):
+                raise TypeError("The escape table values must be str.")
+
+        self.table = dict(table)
+        self.numeric = numeric
+        self.__decode_table = {"\\" + key: value for key, value in self.table.items()}
+
+        alternatives = []
+        if numeric:
+            alternatives += [f"{key}([0-9a-fA-F]{{{digits}}})" for key, digits in _NUMERIC_ESCAPES.items()]
+
+        # The table alternative is always the last group, an empty class matches nothing.
+        # 转义表分支总是最后一个分组, 空的字符类不匹配任何内容.
+        keys = "".join(re.escape(key) for key in self.table)
+        alternatives.append(f"([{keys}])" if keys else "(?!)()")
+        self.__decode_pattern = re.compile(r"\\(?:" + "|".join(alternatives) + ")")
+
+        # The first key wins when several keys decode to the same character.
+        # 当多个键解码为同一字符时以第一个键为准.
+        self.__encode_table = {}
+        for key, value in self.table.items():
+            if len(value) == 1:
+                self.__encode_table.setdefault(value, "\\" + key)
+
+        # Without the backslash in the table nothing can be encoded, see `encode`.
+        # 转义表中没有反斜杠时无法编码, 参见 `encode`.
+        chars = "".join(re.escape(char) for char in self.__encode_table)
+        self.__encode_pattern = re.compile(f"[{chars}]") if chars else None
+        self.__encode_ascii_pattern = re.compile(f"[{chars}]|[^\\x00-\\x7f]") if chars and numeric else None
+
+
+    def __decode_replace(self, match: re.Match) -> str:
+        text = match.group()
+        result = self.__decode_table.get(text, None)
+
+        if result is not None:
+            return result
+
+        code = int(text[2:], 16)
+
+        # Code points beyond the unicode range are kept as they are.
+        # 超出 unicode 范围的码点保持原样.
+        return chr(code) if code <= 0x10FFFF else text
 
-    keyword = "\\"
-    length = len(keyword)
-    not_found = -1
 
-    _input = value
-    output = ""
+    def __encode_replace(self, match: re.Match) -> str:
+        char = match.group(0)
+        result = self.__encode_table.get(char, None)
 
-    while True:
-        result = _input.find(keyword)
-        if result == not_found:
-            output += _input
-            break
+        if result is not None:
+            return result
 
-        output += _input[:result]
-        _input = _input[result+length:]
+        code = ord(char)
+        return f"\\u{code:04x}" if code <= 0xFFFF else f"\\U{code:08x}"
 
-        if not _input:
-            output += keyword
-            break
 
-        if _input[0] not in table:
-            output += keyword
-            continue
+    def decode(self, value: str) -> str:
+        """
+        ## Decode escapes
+        ## 解码转义
 
-        output += table[_input[0]]
-        _input = _input[1:]
+        Unknown escapes, malformed numeric escapes and a trailing backslash are kept as they are.
+
+        未知的转义, 格式错误的数值转义和末尾的反斜杠保持原样.
+        """
+        if "\\" not in value:
+            return value
+
+        return self.__decode_pattern.sub(self.__decode_replace, value)
+
+
+    def decode_batch(self, values: Iterable[str]) -> list[str]:
+        """
+        ## Decode escapes in batch
+        ## 批量解码转义
+
+        The values are joined and decoded by one substitution, values without a backslash cost nothing.
+        Falls back to decoding one by one when the separator cannot be used safely.
+
+        值会被连接起来并通过一次替换完成解码, 不含反斜杠的值没有额外开销.
+        当分隔符无法安全使用时回退为逐个解码.
+        """
+        values = values if isinstance(values, list) else list(values)
+        joined = _BATCH_SEPARATOR.join(values)
+
+        if "\\" not in joined:
+            return values[:]
+
+        expected = len(values) - 1
+
+        if _BATCH_SEPARATOR not in self.table and joined.count(_BATCH_SEPARATOR) == expected:
+            result = self.decode(joined)
+
+            # A numeric escape may have produced the separator itself.
+            # 数值转义可能恰好生成了分隔符本身.
+            if result.count(_BATCH_SEPARATOR) == expected:
+                return result.split(_BATCH_SEPARATOR)
+
+        decode = self.decode
+        return [decode(value) if "\\" in value else value for value in values]
+
+
+    def decode_iter(self, values: Iterable[str]) -> Iterator[str]:
+        """
+        ## Decode escapes as a stream
+        ## 流式解码转义
+
+        Decodes chunk by chunk, suitable for file sized inputs such as the lines of an open file.
+
+        按块解码, 适用于文件大小的输入, 例如已打开文件的各行.
+        """
+        chunk = []
+
+        for value in values:
+            chunk.append(value)
+
+            if len(chunk) >= _STREAM_CHUNK:
+                yield from self.decode_batch(chunk)
+                chunk = []
+
+        if chunk:
+            yield from self.decode_batch(chunk)
+
+
+    def encode(self, value: str, ascii_only: bool = False) -> str:
+        """
+        ## Encode escapes
+        ## 编码转义
+
+        The reverse of `decode`, the table must contain the backslash itself so that the result round-trips.
+        With `ascii_only` non-ASCII characters are written as numeric escapes.
+
+        `decode` 的逆操作, 转义表必须包含反斜杠本身以保证结果可以还原.
+        开启 `ascii_only` 时非 ASCII 字符将写为数值转义.
+        """
+        if "\\" not in self.__encode_table:
+            raise ValueError("The escape table cannot encode the backslash.")
+
+        if ascii_only:
+            if self.__encode_ascii_pattern is None:
+                raise ValueError("The ascii_only requires numeric escapes.")
+
+            return self.__encode_ascii_pattern.sub(self.__encode_replace, value)
+
+        return self.__encode_pattern.sub(self.__encode_replace, value)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_escape_codec(items: tuple[tuple[str, str], ...], numeric: bool) -> EscapeCodec:
+    return EscapeCodec(dict(items), numeric)
+
+
+_DEFAULT_CODEC = EscapeCodec(ESCAPE_TABLE)
+
+
+def get_escape_codec(table: Mapping[str, str] | None = None, numeric: bool = True) -> EscapeCodec:
+    """
+    ## Get escape codec
+    ## 获取转义编解码器
 
-    return output
+    ```TEXT
+    args:
+        table: Escape table, maps the character after the backslash to its replacement, defaults to ESCAPE_TABLE.
+               转义表, 将反斜杠后的字符映射为其替换内容, 默认为 ESCAPE_TABLE.
+
+        numeric: Whether to support \\xNN, \\uXXXX and \\UXXXXXXXX escapes.
+                 是否支持 \\xNN, \\uXXXX 和 \\UXXXXXXXX 转义.
+
+    return:
+        EscapeCodec
+        A cached codec, the same table always returns the same object.
+        缓存的编解码器, 相同的转义表总是返回同一个对象.
+    ```
+    """
+    if table is None and numeric:
+        return _DEFAULT_CODEC
+
+    items = tuple(ESCAPE_TABLE.items() if table is None else table.items())
+    return _compile_escape_codec(items, numeric)
+
+
+def escape_decode(value: str, table: Mapping[str, str] | None = None) -> str:
+    """
+    ## Escape decode
+    ## 转义解码
+
+    Like `escape_character_recognition`, but also understands \\0, \\", \\xNN, \\uXXXX
+    and \\UXXXXXXXX, or the escapes of a custom table.
+
+    类似 `escape_character_recognition`, 但同时支持 \\0, \\", \\xNN, \\uXXXX
+    和 \\UXXXXXXXX, 或自定义转义表中的转义.
+    """
+    return get_escape_codec(table).decode(value)
+
+
+def escape_decode_batch(values: Iterable[str], table: Mapping[str, str] | None = None) -> list[str]:
+    """
+    ## Escape decode in batch
+    ## 批量转义解码
+
+    Decode every value of an iterable, see `EscapeCodec.decode_batch`.
+
+    解码可迭代对象中的每个值, 参见 `EscapeCodec.decode_batch`.
+    """
+    return get_escape_codec(table).decode_batch(values)
+
+
+def escape_decode_iter(values: Iterable[str], table: Mapping[str, str] | None = None) -> Iterator[str]:
+    """
+    ## Escape decode as a stream
+    ## 流式转义解码
+
+    Lazily decode the values of an iterable, see `EscapeCodec.decode_iter`.
+
+    惰性解码可迭代对象中的值, 参见 `EscapeCodec.decode_iter`.
+    """
+    return get_escape_codec(table).decode_iter(values)
+
+
+def escape_encode(value: str, table: Mapping[str, str] | None = None, ascii_only: bool = False) -> str:
+    """
+    ## Escape encode
+    ## 转义编码
+
+    The reverse of `escape_decode`, used when writing language and configuration files.
+
+    `escape_decode` 的逆操作, 用于写出语言文件和配置文件.
+    """
+    return get_escape_codec(table).encode(value, ascii_only)
+
+
+# Doubled braces are literal braces, a field is a positional index or a name,
+# names may hold any character but braces, such as "user.name" or "a-b".
+# 双写的花括号表示字面花括号, 字段为位置索引或名称,
+# 名称可以包含花括号以外的任何字符, 例如 "user.name" 或 "a-b".
+_TEMPLATE_PATTERN = re.compile(r"\{\{|\}\}|\{([^{}]+)\}")
+
+# Maximum number of compiled templates kept by `compile_template`.
+# `compile_template` 最多保留的已编译模板数量.
+_TEMPLATE_CACHE_SIZE = 1024
+
+
+class Template (object):
+    """
+    ## String template
+    ## 字符串模板
+
+    Parses `{0}` and `{name}` placeholders once and renders them in one pass,
+    `{{` and `}}` are literal braces, placeholders without a value are kept as they are.
+
+    一次性解析 `{0}` 和 `{name}` 占位符并单次完成渲染,
+    `{{` 和 `}}` 表示字面花括号, 没有值的占位符保持原样.
+    """
+
+    def __init__(self, template: str):
+        if not isinstance(template, str):
+            raise TypeError("The template type is not str.")
+
+        self.template = template
+
+        # Rendering copies the parts and fills the field slots, a field keeps its own text by default.
+        # 渲染时复制各部分并填充字段槽位, 字段默认保留其自身文本.
+        parts = []
+        fields = []
+        literal = []
+        index = 0
+
+        for match in _TEMPLATE_PATTERN.finditer(template):
+            literal.append(template[index:match.start()])
+            index = match.end()
+            name = match.group(1)
+
+            if name is None:
+                literal.append(match.group()[0])
+                continue
+
+            parts.append("".join(literal))
+            literal = []
+            # Only ASCII digits are positional, str.isdigit also accepts characters like "²" that int() rejects.
+            # 只有 ASCII 数字表示位置参数, str.isdigit 也接受 "²" 这类 int() 无法转换的字符.
+            key = int(name) if name.isascii() and name.isdigit() else name
+            fields.append((len(parts), key))
+            parts.append(match.group())
+
+        literal.append(template[index:])
+        parts.append("".join(literal))
+
+        self.__parts = parts
+        self.__fields = fields
+        self.__static = parts[0] if not fields else None
+
+
+    def render(self, *args, **kwds) -> str:
+        if self.__static is not None:
+            return self.__static
+
+        result = self.__parts[:]
+        count = len(args)
+
+        for slot, key in self.__fields:
+            if key.__class__ is int:
+                if key < count:
+                    result[slot] = f"{args[key]}"
+
+            elif key in kwds:
+                result[slot] = f"{kwds[key]}"
+
+        return "".join(result)
+
+
+@functools.lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def compile_template(template: str) -> Template:
+    """
+    ## Compile template
+    ## 编译模板
+
+    Returns the compiled `Template`, the most recently used templates are cached.
+
+    返回已编译的 `Template`, 最近使用的模板会被缓存.
+    """
+    return Template(template)
+
+
+def format_template(template: str, *args, **kwds) -> str:
+    """
+    ## Format template
+    ## 格式化模板
+
+    Render `{0}` and `{name}` placeholders with the given values, see `Template`.
+
+    使用给定的值渲染 `{0}` 和 `{name}` 占位符, 参见 `Template`.
+    """
+    return compile_template(template).render(*args, **kwds)
 
 
 __all__ = [
     "escape_character_recognition",
+    "ESCAPE_TABLE",
+    "EscapeCodec",
+    "get_escape_codec",
+    "escape_decode",
+    "escape_decode_batch",
+    "escape_decode_iter",
+    "escape_encode",
+    "Template",
+    "compile_template",
+    "format_template",
 ]
@@ -3,12 +3,18 @@
 # threadextra
 
 # std
-import ctypes
-import inspect
+import os
+import sys
+import time
+import queue
+import weakref
+import functools
+import itertools
 import threading
+import collections
 
 from threading import *
-from typing import Union, Type
+from typing import Any, Callable, Iterator, NamedTuple, Union, Type
 
 
 __name__ = "threadextra"
@@ -16,12 +22,270 @@ __author__ = "numlinka"
 __license__ = "LGPL 3.0"
 __copyright__ = "Copyright (C) 2022 numlinka"
 
-__version_info__ = (1, 0, 2)
+__version_info__ = (1, 5, 7)
 __version__ = ".".join(map(str, __version_info__))
 
 
+class Cancelled (BaseException):
+    """The cancellation token of the current thread or task was cancelled."""
+
+
+
+class CancellationToken (object):
+    """
+    ## Cancellation token
+    ## 取消令牌
+
+    Cooperative cancellation, the wait primitives wake up as soon as the token is cancelled and raise `Cancelled`.
+    Unlike `force_stop`, this also works while the thread is blocked and never lands in the middle of a `finally`.
+
+    协作式取消, 等待原语会在令牌被取消时立即唤醒并抛出 `Cancelled`.
+    与 `force_stop` 不同, 它在线程阻塞时同样有效, 并且永远不会在 `finally` 中途打断.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__condition = None
+        self.__cancelled = False
+        self.__waiting = {}
+
+
+    def cancel(self) -> None:
+        """
+        ## Cancel
+        ## 取消
+
+        Cancel the token and wake up every wait that uses it.
+
+        取消令牌并唤醒所有使用它的等待.
+        """
+        with self.__lock:
+            if self.__cancelled:
+                return
+
+            self.__cancelled = True
+            conditions = list(self.__waiting)
+
+        for condition in conditions:
+            with condition:
+                condition.notify_all()
+
+
+    def cancelled(self) -> bool:
+        return self.__cancelled
+
+
+    def raise_if_cancelled(self) -> None:
+        if self.__cancelled:
+            raise Cancelled()
+
+
+    def wait(self, condition: Condition, predicate: Callable[[], Any], timeout: float | None = None) -> Any:
+        """
+        ## Wait for condition
+        ## 等待条件
+
+        Like `Condition.wait_for`, the caller must hold the condition.
+        Raises `Cancelled` if the token is cancelled before the predicate becomes true.
+
+        类似 `Condition.wait_for`, 调用者必须持有该条件.
+        如果令牌在谓词成立前被取消, 则抛出 `Cancelled`.
+
+        ```TEXT
+        return: The last result of the predicate, false on timeout.
+                谓词的最后结果, 超时则为假.
+        ```
+        """
+        with self.__lock:
+            self.__waiting[condition] = self.__waiting.get(condition, 0) + 1
+
+        try:
+            # The flag is checked while holding the condition and cancel() notifies under it,
+            # so a cancel cannot slip in between the check and the wait.
+            # 在持有条件时检查标志, 而 cancel() 在条件下通知, 因此取消不会在检查与等待之间被遗漏.
+            end = None if timeout is None else time.monotonic() + timeout
+            result = predicate()
+
+            while not result:
+                self.raise_if_cancelled()
+
+                if end is None:
+                    condition.wait()
+
+                else:
+                    remaining = end - time.monotonic()
+
+                    if remaining <= 0:
+                        break
+
+                    condition.wait(remaining)
+
+                result = predicate()
+
+            return result
+
+        finally:
+            with self.__lock:
+                if self.__waiting[condition] == 1:
+                    del self.__waiting[condition]
+
+                else:
+                    self.__waiting[condition] -= 1
+
+
+    def sleep(self, seconds: float) -> None:
+        """
+        ## Sleep
+        ## 睡眠
+
+        Interruptible `time.sleep`.
+
+        可中断的 `time.sleep`.
+        """
+        if self.__condition is None:
+            with self.__lock:
+                if self.__condition is None:
+                    self.__condition = threading.Condition(threading.Lock())
+
+        with self.__condition:
+            self.raise_if_cancelled()
+            self.wait(self.__condition, lambda: False, seconds)
+
+
+    def wait_event(self, event: Event, timeout: float | None = None) -> bool:
+        """
+        ## Wait for event
+        ## 等待事件
+
+        Interruptible `Event.wait`, only `threading.Event` and its subclasses are supported.
+
+        可中断的 `Event.wait`, 仅支持 `threading.Event` 及其子类.
+        """
+        # The wait hooks into the condition of the event, other event types have none.
+        # 等待挂接在事件的条件上, 其它类型的事件没有该条件.
+        if not isinstance(event, threading.Event):
+            raise TypeError("The event type is not threading.Event.")
+
+        condition = event._cond
+
+        with condition:
+            return self.wait(condition, event.is_set, timeout)
+
+
+    def queue_get(self, q: queue.Queue, timeout: float | None = None) -> Any:
+        """
+        ## Get from queue
+        ## 从队列获取
+
+        Interruptible `queue.Queue.get`, raises `queue.Empty` on timeout.
+        Only `queue.Queue` and its subclasses are supported, `queue.SimpleQueue` has no condition to wait on.
+
+        可中断的 `queue.Queue.get`, 超时则抛出 `queue.Empty`.
+        仅支持 `queue.Queue` 及其子类, `queue.SimpleQueue` 没有可等待的条件.
+        """
+        if not isinstance(q, queue.Queue):
+            raise TypeError("The queue type is not queue.Queue.")
+
+        with q.not_empty:
+            if not self.wait(q.not_empty, q._qsize, timeout):
+                raise queue.Empty
+
+            item = q._get()
+            q.not_full.notify()
+            return item
+
+
+
 class ThreadExtra (Thread):
+    def __init__(self, *args, token: CancellationToken | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token = CancellationToken() if token is None else token
+        self.__guarded = False
+
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Subclasses that override run get the same quiet cancellation and registration as the base run.
+        # 重写 run 的子类获得与基类 run 相同的安静取消与注册.
+        if "run" in cls.__dict__:
+            cls.run = ThreadExtra.__guard(cls.__dict__["run"])
+
+
+    @staticmethod
+    def __guard(run: Callable[["ThreadExtra"], None]) -> Callable[["ThreadExtra"], None]:
+        @functools.wraps(run)
+        def wrapper(self: "ThreadExtra") -> None:
+            # Only the outermost run of the thread is guarded, runs reached through super() are called as is.
+            # 只有线程最外层的 run 受到保护, 通过 super() 调用的 run 原样执行.
+            if self.__guarded or threading.current_thread() is not self:
+                return run(self)
+
+            self.__guarded = True
+            registry = _registry
+
+            if registry is not None:
+                registry.register(self)
+
+            # Cancelled ends the thread quietly, the same way SystemExit does.
+            # Cancelled 与 SystemExit 一样安静地结束线程.
+            try:
+                run(self)
+
+            except Cancelled as _:
+                ...
+
+            finally:
+                self.__guarded = False
+
+                if registry is not None:
+                    registry.unregister(self)
+
+        return wrapper
+
+
+    def cancel(self, timeout: float | None = None, force: bool = False) -> bool:
+        """
+        ## Cancel
+        ## 取消
+
+        Cancel the token of the thread and wait for it to exit,
+        `force_stop` is used as the last resort if it is still alive after the timeout.
+
+        取消线程的令牌并等待其退出,
+        如果超时后仍然存活, 则使用 `force_stop` 作为最后手段.
+
+        ```TEXT
+        return: Whether the thread has exited.
+                线程是否已经退出.
+        ```
+        """
+        self.token.cancel()
+
+        if self.ident is None or self is threading.current_thread():
+            return not self.is_alive()
+
+        self.join(timeout)
+
+        if self.is_alive() and force:
+            self.force_stop()
+            self.join(timeout)
+
+        return not self.is_alive()
+
+
+    def run(self) -> None:
+        super().run()
+
+
+    run = __guard(run)
+
+
     def force_stop(self) -> None:
+        # ctypes is only loaded by the first forced stop.
+        # ctypes 只在第一次强制停止时加载.
+        import ctypes
+
         tid = ctypes.c_long(self.ident)
         exctype = ctypes.py_object(SystemExit)
         result = ctypes.pythonapi.PyThreadState_SetAsyncExc(tid, exctype)
@@ -33,6 +297,18 @@ class ThreadExtra (Thread):
             raise SystemError("PyThreadState_SetAsyncExc failed")
 
 
+def current_token() -> CancellationToken | None:
+    """
+    ## Current token
+    ## 当前令牌
+
+    The cancellation token of the current `ThreadExtra` thread or pool task, None for other threads.
+
+    当前 `ThreadExtra` 线程或线程池任务的取消令牌, 其它线程为 None.
+    """
+    return getattr(threading.current_thread(), "token", None)
+
+
 def force_stop_thread(thread: Union[int, Thread], exctype: Type[BaseException] = SystemExit) -> None:
     if isinstance(thread, int):
         tid = thread
@@ -41,9 +317,11 @@ def force_stop_thread(thread: Union[int, Thread], exctype: Type[BaseException] =
     else:
         raise TypeError("Argument 1 must be int or threading.Thread")
 
+    import ctypes
+
     c_tid = ctypes.c_long(tid)
 
-    if not inspect.isclass(exctype):
+    if not isinstance(exctype, type):
         raise TypeError("Argument 2 must be type")
     elif not issubclass(exctype, BaseException):
         raise TypeError("Argument 2 must be subclass of BaseException")
@@ -60,7 +338,910 @@ def force_stop_thread(thread: Union[int, Thread], exctype: Type[BaseException] =
 
 
 
+class StopReport (NamedTuple):
+    """Outcome of `ThreadGroup.stop`, threads in `alive` did not exit even after escalation."""
+    stopped: list[Thread]
+    forced: list[Thread]
+    alive: list[Thread]
+
+
+
+class ThreadGroup (object):
+    """
+    ## Thread group
+    ## 线程组
+
+    Stops many threads at once: every member is signalled first, then all of them are joined
+    against one shared deadline, stragglers are escalated with `force_stop_thread`.
+    `ThreadExtra` members are signalled through their cancellation token.
+
+    一次停止多个线程: 先向所有成员发出信号, 然后在同一个截止时间内等待它们全部结束,
+    未退出的线程使用 `force_stop_thread` 升级处理.
+    `ThreadExtra` 成员通过其取消令牌接收信号.
+
+    ```TEXT
+    args:
+        threads: Initial members.
+                 初始成员.
+    ```
+    """
+
+    def __init__(self, threads: list[Thread] | tuple[Thread, ...] = ()):
+        self.__lock = threading.Lock()
+        self.__threads = list(threads)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+
+    def __iter__(self) -> Iterator[Thread]:
+        with self.__lock:
+            return iter(list(self.__threads))
+
+
+    def __len__(self) -> int:
+        return len(self.__threads)
+
+
+    def add(self, thread: Thread) -> Thread:
+        with self.__lock:
+            self.__threads.append(thread)
+
+        return thread
+
+
+    def spawn(self, target: Callable, *args, name: str | None = None, daemon: bool | None = True, **kwargs) -> ThreadExtra:
+        """
+        ## Spawn
+        ## 生成
+
+        Create, add and start a `ThreadExtra` member.
+
+        创建、加入并启动一个 `ThreadExtra` 成员.
+        """
+        thread = self.add(ThreadExtra(target=target, args=args, kwargs=kwargs, name=name, daemon=daemon))
+        thread.start()
+        return thread
+
+
+    def start(self) -> None:
+        for thread in self:
+            if thread.ident is None:
+                thread.start()
+
+
+    def alive(self) -> list[Thread]:
+        return [thread for thread in self if thread.is_alive()]
+
+
+    def stop(self, timeout: float | None = 1.0, force: bool = True, exctype: Type[BaseException] = SystemExit, grace: float = 0.1) -> StopReport:
+        """
+        ## Stop
+        ## 停止
+
+        ```TEXT
+        args:
+            timeout: Seconds all members share to exit after the signal, None waits forever.
+                     所有成员在收到信号后共享的退出时间 (秒), None 表示无限等待.
+
+            force: Whether to escalate stragglers with `force_stop_thread`.
+                   是否使用 `force_stop_thread` 升级处理未退出的线程.
+
+            exctype: Exception raised in the stragglers.
+                     在未退出线程中抛出的异常.
+
+            grace: Seconds the stragglers share to exit after the escalation.
+                   未退出线程在升级处理后共享的退出时间 (秒).
+        ```
+        """
+        threads = [thread for thread in self if thread.ident is not None]
+        current = threading.current_thread()
+
+        for thread in threads:
+            token = getattr(thread, "token", None)
+
+            if isinstance(token, CancellationToken):
+                token.cancel()
+
+        stragglers = _join_all(threads, timeout, current)
+        stopped = [thread for thread in threads if thread not in stragglers]
+        forced = []
+
+        if force and stragglers:
+            for thread in stragglers:
+                if thread is current:
+                    continue
+
+                try:
+                    force_stop_thread(thread, exctype)
+
+                except (ValueError, SystemError) as _:
+                    ...
+
+            alive = _join_all(stragglers, grace, current)
+            forced = [thread for thread in stragglers if thread not in alive]
+            stragglers = alive
+
+        with self.__lock:
+            self.__threads = [thread for thread in self.__threads if thread.ident is None or thread.is_alive()]
+
+        return StopReport(stopped, forced, stragglers)
+
+
+
+def _join_all(threads: list[Thread], timeout: float | None, current: Thread) -> list[Thread]:
+    """Join the threads against one shared deadline and return the ones still alive."""
+    end = None if timeout is None else time.monotonic() + timeout
+
+    for thread in threads:
+        if thread is current:
+            continue
+
+        if end is None:
+            thread.join()
+
+        else:
+            remaining = end - time.monotonic()
+
+            if remaining <= 0:
+                break
+
+            thread.join(remaining)
+
+    return [thread for thread in threads if thread.is_alive()]
+
+
+
+class ThreadInfo (NamedTuple):
+    """
+    State of a registered thread, times are in seconds and cpu_time is None where it cannot be measured.
+    stack is a traceback.StackSummary, a list subclass, annotated as list so that traceback stays unimported.
+    """
+    name: str
+    ident: int
+    native_id: int | None
+    started: float
+    running: float
+    task: str | None
+    task_running: float | None
+    cpu_time: float | None
+    stack: list | None
+
+
+class _RegistryEntry (object):
+    __slots__ = ("thread", "started", "clock", "task", "task_started")
+
+    def __init__(self, thread: Thread):
+        self.thread = thread
+        self.started = time.time()
+        self.task = None
+        self.task_started = None
+
+        try:
+            self.clock = time.pthread_getcpuclockid(thread.ident)
+
+        except (AttributeError, OSError) as _:
+            self.clock = None
+
+
+
+class ThreadRegistry (object):
+    """
+    ## Thread registry
+    ## 线程注册表
+
+    Tracks the `ThreadExtra` threads and pool workers while it is enabled with `enable_registry`.
+
+    在通过 `enable_registry` 启用期间, 跟踪 `ThreadExtra` 线程和线程池工作线程.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__entries = {}
+
+
+    def register(self, thread: Thread) -> None:
+        """Called from inside the thread, the cpu clock can only be resolved once it is running."""
+        entry = _RegistryEntry(thread)
+
+        with self.__lock:
+            self.__entries[thread.ident] = entry
+
+
+    def unregister(self, thread: Thread) -> None:
+        with self.__lock:
+            self.__entries.pop(thread.ident, None)
+
+
+    def set_task(self, task: str | None, ident: int | None = None) -> None:
+        """
+        ## Set task
+        ## 设置任务
+
+        Set the description of the task the thread is running, None when it is idle.
+
+        设置线程正在运行的任务的描述, 空闲时为 None.
+        """
+        entry = self.__entries.get(threading.get_ident() if ident is None else ident)
+
+        if entry is not None:
+            entry.task = task
+            entry.task_started = None if task is None else time.monotonic()
+
+
+    def idents(self) -> list[int]:
+        with self.__lock:
+            return list(self.__entries)
+
+
+    def snapshot(self, stacks: bool = False, limit: int | None = None) -> list[ThreadInfo]:
+        """
+        ## Snapshot
+        ## 快照
+
+        ```TEXT
+        args:
+            stacks: Whether to capture the current stack of each thread.
+                    是否捕获每个线程的当前调用栈.
+
+            limit: Maximum number of frames in each stack.
+                   每个调用栈的最大帧数.
+        ```
+        """
+        with self.__lock:
+            entries = list(self.__entries.items())
+
+        if stacks:
+            import traceback
+
+        frames = sys._current_frames() if stacks else {}
+        now = time.time()
+        monotonic = time.monotonic()
+        result = []
+
+        for ident, entry in entries:
+            cpu_time = None
+
+            if entry.clock is not None:
+                try:
+                    cpu_time = time.clock_gettime(entry.clock)
+
+                except OSError as _:
+                    ...
+
+            elif ident == threading.get_ident():
+                cpu_time = time.thread_time()
+
+            frame = frames.get(ident)
+            task_started = entry.task_started
+
+            result.append(ThreadInfo(
+                name=entry.thread.name,
+                ident=ident,
+                native_id=entry.thread.native_id,
+                started=entry.started,
+                running=now - entry.started,
+                task=entry.task,
+                task_running=None if task_started is None else monotonic - task_started,
+                cpu_time=cpu_time,
+                stack=None if frame is None else traceback.extract_stack(frame, limit)
+            ))
+
+        return result
+
+
+
+_registry = None
+
+
+def enable_registry() -> ThreadRegistry:
+    """
+    ## Enable registry
+    ## 启用注册表
+
+    Threads started after this call are tracked, calling it again returns the same registry.
+
+    此调用之后启动的线程会被跟踪, 重复调用返回同一个注册表.
+    """
+    global _registry
+
+    if _registry is None:
+        _registry = ThreadRegistry()
+
+    return _registry
+
+
+def disable_registry() -> None:
+    global _registry
+    _registry = None
+
+
+def get_registry() -> ThreadRegistry | None:
+    return _registry
+
+
+
+class SamplingProfiler (ThreadExtra):
+    """
+    ## Sampling profiler
+    ## 采样分析器
+
+    Samples the stacks of the registered threads at a fixed interval and counts the hot frames.
+    The cost is one `sys._current_frames` call per sample, so it stays cheap enough for production.
+
+    以固定间隔对已注册线程的调用栈进行采样, 并统计热点帧.
+    每次采样的开销只是一次 `sys._current_frames` 调用, 因此足以在生产环境中使用.
+
+    ```TEXT
+    args:
+        registry: The registry whose threads are sampled, defaults to the enabled one.
+                  被采样线程所属的注册表, 默认为已启用的注册表.
+
+        interval: Seconds between samples.
+                  采样间隔 (秒).
+    ```
+    """
+
+    def __init__(self, registry: ThreadRegistry | None = None, interval: float = 0.01):
+        super().__init__(name="SamplingProfiler", daemon=True)
+        self.registry = enable_registry() if registry is None else registry
+        self.interval = interval
+        self.samples = 0
+        self.__lock = threading.Lock()
+        self.__self = collections.Counter()
+        self.__total = collections.Counter()
+
+
+    def run(self) -> None:
+        while True:
+            self.token.sleep(self.interval)
+            self.sample()
+
+
+    def sample(self) -> None:
+        idents = self.registry.idents()
+        frames = sys._current_frames()
+
+        with self.__lock:
+            self.samples += 1
+
+            for ident in idents:
+                # The profiler is registered like any ThreadExtra, but never samples itself.
+                # 分析器与其它 ThreadExtra 一样被注册, 但从不采样自身.
+                if ident == self.ident:
+                    continue
+
+                frame = frames.get(ident)
+
+                if frame is None:
+                    continue
+
+                self.__self[_frame_key(frame)] += 1
+                seen = set()
+
+                while frame is not None:
+                    key = _frame_key(frame)
+
+                    # Recursive frames count once per sample.
+                    # 递归帧在每次采样中只计一次.
+                    if key not in seen:
+                        seen.add(key)
+                        self.__total[key] += 1
+
+                    frame = frame.f_back
+
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.cancel(timeout)
+
+
+    def hot(self, top: int = 10, cumulative: bool = False) -> list[tuple[tuple[str, int, str], int]]:
+        """
+        ## Hot frames
+        ## 热点帧
+
+        ```TEXT
+        args:
+            top: Number of frames to return.
+                 返回的帧数量.
+
+            cumulative: Count frames anywhere on the stack instead of only the innermost one.
+                        统计调用栈中任意位置的帧, 而不仅是最内层的帧.
+
+        return: ((filename, first line, function), samples) pairs, hottest first.
+                ((文件名, 首行, 函数), 采样数) 对, 最热的在前.
+        ```
+        """
+        with self.__lock:
+            return (self.__total if cumulative else self.__self).most_common(top)
+
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.samples = 0
+            self.__self.clear()
+            self.__total.clear()
+
+
+
+def _frame_key(frame) -> tuple[str, int, str]:
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _describe(fn: Callable) -> str:
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+
+class TaskDeadlineExceeded (TimeoutError):
+    """The task did not finish before its deadline and its worker was stopped."""
+
+
+class _DeadlineInterrupt (BaseException):
+    """Raised asynchronously in a worker whose task is past its deadline, it is not meant to be caught by tasks."""
+
+
+class _WorkerState (object):
+    def __init__(self):
+        self.thread = None
+        self.item = None
+        self.token = None
+        self.deadline = None
+        self.abandoned = False
+        self.interrupted = False
+
+
+
+def _define_executor() -> type:
+    # concurrent.futures pulls in logging, the pool class is only defined on first use.
+    # concurrent.futures 会引入 logging, 线程池类仅在首次使用时定义.
+    import concurrent.futures
+
+    class ThreadPoolExecutorExtra (concurrent.futures.Executor):
+        """
+        ## Thread pool executor with deadlines
+        ## 带截止时间的线程池执行器
+
+        Compatible with concurrent.futures, each task runs with its own token from `current_token()`.
+        When a task is past its deadline the watchdog cancels its token first, if the task has not
+        exited after the grace period, the worker is stopped with `force_stop_thread` and replaced,
+        so a stuck task cannot reduce the throughput.
+
+        The future of such a task fails with `TaskDeadlineExceeded`.
+        The forced stop is only delivered when the worker runs Python bytecode again,
+        a worker blocked in a system call keeps running in the background until the call returns.
+
+        与 concurrent.futures 兼容, 每个任务都在自己的令牌下运行, 可通过 `current_token()` 获取.
+        当任务超过截止时间时, 看门狗先取消它的令牌, 如果任务在宽限期后仍未退出,
+        则使用 `force_stop_thread` 停止该工作线程并替换它, 因此卡住的任务不会降低吞吐量.
+
+        这类任务的 future 会以 `TaskDeadlineExceeded` 失败.
+        强制停止只有在工作线程再次执行 Python 字节码时才会生效,
+        阻塞在系统调用中的工作线程会在后台继续运行, 直到调用返回.
+
+        ```TEXT
+        args:
+            max_workers: Maximum number of live workers, defaults to min(32, cpu count + 4).
+                         存活工作线程的最大数量, 默认为 min(32, cpu 数量 + 4).
+
+            thread_name_prefix: Prefix of the worker thread names.
+                                工作线程名称的前缀.
+
+            timeout: Default deadline of each task in seconds, None means no deadline.
+                     每个任务默认的截止时间 (秒), None 表示没有截止时间.
+
+            grace: Seconds between cancelling the token and stopping the worker.
+                   从取消令牌到停止工作线程之间的秒数.
+        ```
+        """
+
+        _counter = itertools.count()
+
+        def __init__(self, max_workers: int | None = None, thread_name_prefix: str = "", timeout: float | None = None, grace: float = 0.05):
+            if max_workers is None:
+                max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+            if max_workers <= 0:
+                raise ValueError("max_workers must be greater than 0")
+
+            self.max_workers = max_workers
+            self.timeout = timeout
+            self.grace = grace
+            self.thread_name_prefix = thread_name_prefix or f"ThreadPoolExecutorExtra-{next(self._counter)}"
+
+            self.__condition = threading.Condition(threading.RLock())
+            self.__queue = queue.SimpleQueue()
+            self.__workers = []
+            self.__idle = threading.Semaphore(0)
+            self.__shutdown = False
+            self.__watchdog = None
+            self.__names = itertools.count()
+
+
+        def submit(self, fn: Callable, /, *args, **kwargs) -> concurrent.futures.Future:
+            return self.submit_with_deadline(self.timeout, fn, *args, **kwargs)
+
+
+        def submit_with_deadline(self, timeout: float | None, fn: Callable, /, *args, **kwargs) -> concurrent.futures.Future:
+            """
+            ## Submit with deadline
+            ## 提交带截止时间的任务
+
+            Like `submit`, the deadline in seconds starts when a worker picks up the task.
+
+            类似 `submit`, 截止时间 (秒) 从工作线程开始执行任务时计算.
+            """
+            with self.__condition:
+                if self.__shutdown:
+                    raise RuntimeError("cannot schedule new futures after shutdown")
+
+                future = concurrent.futures.Future()
+                self.__queue.put((future, fn, args, kwargs, timeout))
+
+                if not self.__idle.acquire(timeout=0) and len(self.__workers) < self.max_workers:
+                    self.__spawn()
+
+                if timeout is not None:
+                    self.__start_watchdog()
+
+                return future
+
+
+        def interrupt(self, future: concurrent.futures.Future) -> bool:
+            """
+            ## Interrupt
+            ## 中断
+
+            Cancel a pending task, or cancel the token of a running one and stop its worker after the grace period.
+            An interrupted running task fails with `Cancelled`.
+
+            取消等待中的任务, 或取消正在运行的任务的令牌, 并在宽限期后停止其工作线程.
+            被中断的运行中任务以 `Cancelled` 失败.
+
+            ```TEXT
+            return: False if the task had already finished.
+                    如果任务已经结束则为 False.
+            ```
+            """
+            if future.cancel():
+                return True
+
+            with self.__condition:
+                for state in self.__workers:
+                    if state.item is not None and state.item[0] is future:
+                        break
+
+                else:
+                    return False
+
+                if not state.interrupted:
+                    state.interrupted = True
+                    state.token.cancel()
+                    state.deadline = time.monotonic() + self.grace
+                    self.__start_watchdog()
+                    self.__condition.notify_all()
+
+                return True
+
+
+        def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+            with self.__condition:
+                self.__shutdown = True
+
+                if cancel_futures:
+                    while True:
+                        try:
+                            item = self.__queue.get_nowait()
+
+                        except queue.Empty as _:
+                            break
+
+                        if item is not None:
+                            item[0].cancel()
+
+                # A single sentinel is passed on from worker to worker.
+                # 单个哨兵在工作线程之间依次传递.
+                self.__queue.put(None)
+                self.__condition.notify_all()
+                threads = [state.thread for state in self.__workers]
+
+            if wait:
+                for thread in threads:
+                    thread.join()
+
+
+        def __start_watchdog(self) -> None:
+            if self.__watchdog is None:
+                self.__watchdog = threading.Thread(target=self.__watch, name=f"{self.thread_name_prefix}_watchdog", daemon=True)
+                self.__watchdog.start()
+
+
+        def __spawn(self) -> None:
+            state = _WorkerState()
+            state.thread = ThreadExtra(target=self.__work, args=(state,), name=f"{self.thread_name_prefix}_{next(self.__names)}", daemon=True)
+            self.__workers.append(state)
+            state.thread.start()
+
+
+        def __work(self, state: _WorkerState) -> None:
+            # The interrupt may arrive late, even during the cleanup of an abandoned worker.
+            # 中断可能延迟到达, 甚至在被放弃的工作线程清理期间.
+            try:
+                try:
+                    self.__loop(state)
+
+                finally:
+                    with self.__condition:
+                        if state in self.__workers:
+                            self.__workers.remove(state)
+
+                        self.__condition.notify_all()
+
+            except _DeadlineInterrupt as _:
+                ...
+
+
+        def __loop(self, state: _WorkerState) -> None:
+            while True:
+                item = self.__queue.get()
+
+                if item is None:
+                    self.__queue.put(None)
+                    return
+
+                future, fn, args, kwargs, timeout = item
+
+                if not future.set_running_or_notify_cancel():
+                    self.__idle.release()
+                    continue
+
+                with self.__condition:
+                    state.item = item
+                    state.token = state.thread.token = CancellationToken()
+                    state.deadline = None if timeout is None else time.monotonic() + timeout
+
+                    if timeout is not None:
+                        self.__condition.notify_all()
+
+                registry = _registry
+
+                if registry is not None:
+                    registry.set_task(_describe(fn))
+
+                try:
+                    result = fn(*args, **kwargs)
+                    exception = None
+
+                except _DeadlineInterrupt:
+                    raise
+
+                except Cancelled as exc:
+                    result = None
+                    exception = exc if state.interrupted or timeout is None else _deadline_exceeded(timeout)
+
+                except BaseException as exc:
+                    result = None
+                    exception = exc
+
+                if registry is not None:
+                    registry.set_task(None)
+
+                with self.__condition:
+                    state.item = None
+                    state.deadline = None
+                    state.interrupted = False
+
+                    if state.abandoned:
+                        return
+
+                if exception is None:
+                    future.set_result(result)
+
+                else:
+                    future.set_exception(exception)
+
+                del item, future, fn, args, kwargs, result, exception
+                self.__idle.release()
+
+
+        def __watch(self) -> None:
+            while True:
+                expired = []
+
+                with self.__condition:
+                    if self.__shutdown and not self.__workers:
+                        return
+
+                    now = time.monotonic()
+                    earliest = None
+
+                    for state in list(self.__workers):
+                        if state.item is None or state.deadline is None:
+                            continue
+
+                        if state.deadline <= now and not state.token.cancelled():
+                            state.token.cancel()
+                            state.deadline = now + self.grace
+
+                        if state.deadline <= now:
+                            expired.append(self.__expire(state))
+
+                        elif earliest is None or state.deadline < earliest:
+                            earliest = state.deadline
+
+                    if not expired:
+                        self.__condition.wait(None if earliest is None else earliest - now)
+
+                # Futures are failed outside the lock, their callbacks may submit new tasks.
+                # 在锁外使 future 失败, 其回调可能会提交新任务.
+                for future, exception in expired:
+                    future.set_exception(exception)
+
+
+        def __expire(self, state: _WorkerState) -> tuple[concurrent.futures.Future, BaseException]:
+            future, timeout = state.item[0], state.item[4]
+            exception = Cancelled() if state.interrupted else _deadline_exceeded(timeout)
+            state.abandoned = True
+            state.item = None
+            self.__workers.remove(state)
+
+            try:
+                force_stop_thread(state.thread, _DeadlineInterrupt)
+
+            except (ValueError, SystemError) as _:
+                ...
+
+            if not self.__shutdown and (not self.__queue.empty() or len(self.__workers) < self.max_workers):
+                self.__spawn()
+
+            return future, exception
+
+    ThreadPoolExecutorExtra.__qualname__ = "ThreadPoolExecutorExtra"
+    return ThreadPoolExecutorExtra
+
+
+
+def _deadline_exceeded(timeout: float) -> TaskDeadlineExceeded:
+    return TaskDeadlineExceeded(f"The task did not finish within {timeout} seconds.")
+
+
+
+class AsyncBridge (object):
+    """
+    ## Asyncio bridge
+    ## asyncio 桥接
+
+    Runs blocking callables on `ThreadPoolExecutorExtra` workers and awaits them.
+    Cancelling the awaiting task, including through `asyncio.timeout`, interrupts the worker:
+    its cancellation token is cancelled first and the worker is force stopped after the grace period.
+
+    Create one bridge per call site to give it its own concurrency limit, bridges without an executor
+    share a default pool.
+
+    在 `ThreadPoolExecutorExtra` 工作线程上运行阻塞的可调用对象并等待它们.
+    取消正在等待的任务 (包括通过 `asyncio.timeout`) 会中断工作线程:
+    先取消其取消令牌, 宽限期后强制停止该工作线程.
+
+    为每个调用点创建一个桥接即可拥有独立的并发限制, 没有指定执行器的桥接共享一个默认线程池.
+
+    ```TEXT
+    args:
+        limit: Maximum number of calls of this bridge running at the same time, None means unlimited.
+               此桥接同时运行的最大调用数, None 表示不限制.
+
+        executor: The pool the calls run on.
+                  运行调用的线程池.
+    ```
+    """
+
+    def __init__(self, limit: int | None = None, executor: "ThreadPoolExecutorExtra | None" = None):
+        if limit is not None and limit <= 0:
+            raise ValueError("limit must be greater than 0")
+
+        self.limit = limit
+        self.executor = executor
+
+        # asyncio primitives belong to one event loop, every loop the bridge runs on gets its own semaphore.
+        # asyncio 原语属于单个事件循环, 桥接运行的每个事件循环都有自己的信号量.
+        self.__lock = threading.Lock()
+        self.__semaphores = weakref.WeakKeyDictionary()
+
+
+    async def run(self, func: Callable, /, *args, **kwargs) -> Any:
+        # asyncio is only imported by the code that actually uses it.
+        # 只有真正使用 asyncio 的代码才会导入它.
+        import asyncio
+
+        if self.limit is None:
+            return await self.__run(asyncio, func, args, kwargs)
+
+        loop = asyncio.get_running_loop()
+        semaphore = self.__semaphores.get(loop, None)
+
+        if semaphore is None:
+            with self.__lock:
+                semaphore = self.__semaphores.setdefault(loop, asyncio.Semaphore(self.limit))
+
+        async with semaphore:
+            return await self.__run(asyncio, func, args, kwargs)
+
+
+    async def __run(self, asyncio, func: Callable, args: tuple, kwargs: dict) -> Any:
+        executor = self.executor or _get_default_executor()
+        future = executor.submit(func, *args, **kwargs)
+
+        try:
+            return await asyncio.wrap_future(future)
+
+        except asyncio.CancelledError:
+            executor.interrupt(future)
+            raise
+
+
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def _get_default_executor() -> "ThreadPoolExecutorExtra":
+    global _default_executor
+
+    if _default_executor is None:
+        with _default_executor_lock:
+            if _default_executor is None:
+                _default_executor = __getattr__("ThreadPoolExecutorExtra")(thread_name_prefix="AsyncBridge")
+
+    return _default_executor
+
+
+
+# Names defined on first access, see `__getattr__`.
+# 首次访问时定义的名称, 参见 `__getattr__`.
+_LAZY_NAMES = {
+    "ThreadPoolExecutorExtra": _define_executor,
+}
+_lazy_lock = threading.Lock()
+
+
+def __getattr__(__name: str) -> Any:
+    function = _LAZY_NAMES.get(__name, None)
+
+    if function is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {__name!r}")
+
+    # Concurrent first accesses must all get the same class.
+    # 并发的首次访问必须得到同一个类.
+    with _lazy_lock:
+        if __name not in globals():
+            globals()[__name] = function()
+
+    return globals()[__name]
+
+
+
+# ThreadPoolExecutorExtra stays exported, a star import therefore defines it and loads concurrent.futures.
+# ThreadPoolExecutorExtra 仍然导出, 因此星号导入会定义它并加载 concurrent.futures.
 __all__ = threading.__all__ + [
+    "Cancelled",
+    "CancellationToken",
     "ThreadExtra",
-    "force_stop_thread"
+    "current_token",
+    "force_stop_thread",
+    "StopReport",
+    "ThreadGroup",
+    "ThreadInfo",
+    "ThreadRegistry",
+    "enable_registry",
+    "disable_registry",
+    "get_registry",
+    "SamplingProfiler",
+    "TaskDeadlineExceeded",
+    "ThreadPoolExecutorExtra",
+    "AsyncBridge"
 ]
@@ -3,9 +3,18 @@
 # typex
 
 # std
-from abc import *
-from types import *
-from typing import *
+from __future__ import annotations
+
+import os
+import sys
+import array
+import weakref
+import threading
+import contextvars
+
+from abc import ABC, abstractmethod
+from types import MethodType
+from collections.abc import Iterable, Iterator
 
 
 __name__ = "typex"
@@ -13,7 +22,7 @@ __author__ = "numlinka"
 __license__ = "LGPL 3.0"
 __copyright__ = "Copyright (C) 2022 numlinka"
 
-__version_info__ = (0, 1, 3)
+__version_info__ = (0, 5, 4)
 __version__ = ".".join(map(str, __version_info__))
 
 
@@ -26,36 +35,554 @@ class abstract (ABC):
     abstractmethod
 
 
+_singleton_classes = weakref.WeakSet()
+
+
 class singleton (object):
     """## Singleton class.
 
     A singleton class is a class that can only be instantiated once,
     The __init__ is called only once.
+
+    The first construction is serialized by a per-class lock and the instance is only
+    published after __init__ returns, later constructions return it without locking.
+    Constructing the class again from its own __init__ returns the pending instance.
+
+    Subclasses declared with `fork_reset=True` drop their instance in a forked child.
     """
 
-    _singleton_instance: Self
+    _singleton_instance: singleton
     _singleton_init_method: MethodType
-    _singleton_initialized: bool
+    _singleton_lock: threading.RLock
+    _singleton_fork_reset: bool = False
+
+    def __init_subclass__(cls, fork_reset: bool | None = None, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        _singleton_capture_init(cls)
+
+        if fork_reset is not None:
+            cls._singleton_fork_reset = fork_reset
+
+        cls._singleton_lock = threading.RLock()
+        _singleton_classes.add(cls)
+
+    def __new__(cls, *args, **kwargs) -> singleton:
+        # Lock-free fast path, cls.__dict__ keeps subclasses from seeing the instance of their base.
+        instance = cls.__dict__.get("_singleton_instance")
+        if instance is not None:
+            return instance
 
-    def __new__(cls, *args, **kwargs) -> Self:
         if cls is singleton:
             raise TypeError("Cannot instantiate base singleton class.")
-        if not hasattr(cls, "_singleton_instance"):
-            cls._singleton_init_method = cls.__init__
-            cls.__init__ = singleton.__init__
-            cls._singleton_instance = super(singleton, cls).__new__(cls)
-        return cls._singleton_instance
+
+        with cls._singleton_lock:
+            instance = cls.__dict__.get("_singleton_instance")
+            if instance is not None:
+                return instance
+
+            instance = cls.__dict__.get("_singleton_pending")
+            if instance is not None:
+                return instance
+
+            instance = super(singleton, cls).__new__(cls)
+            cls._singleton_pending = instance
+
+            try:
+                init = getattr(cls, "_singleton_init_method", None)
+                if init is not None:
+                    init(instance, *args, **kwargs)
+
+            finally:
+                del cls._singleton_pending
+
+            cls._singleton_instance = instance
+
+        return instance
+
+    @classmethod
+    def _singleton_reset(cls) -> None:
+        """Forget the instance, the next construction creates and initializes a new one."""
+        with cls._singleton_lock:
+            if "_singleton_instance" in cls.__dict__:
+                del cls._singleton_instance
+
+
+def _singleton_capture_init(cls: type) -> None:
+    # The real __init__ is called once by __new__, the one Python calls after it is a no-op.
+    # It is looked up through the MRO, so an __init__ inherited from a plain base is captured too.
+    init = cls.__init__
+    if init is not object.__init__:
+        cls._singleton_init_method = init
+        cls.__init__ = object.__init__
+
+
+class _LazyProxy (object):
+    """Stands in for a lazy singleton, the instance is created on the first real use."""
+
+    __slots__ = ("_lazy_cls", "_lazy_args", "_lazy_kwargs", "_lazy_instance")
+
+    def __init__(self, cls: type, args: tuple, kwargs: dict) -> None:
+        object.__setattr__(self, "_lazy_cls", cls)
+        object.__setattr__(self, "_lazy_args", args)
+        object.__setattr__(self, "_lazy_kwargs", kwargs)
+        object.__setattr__(self, "_lazy_instance", None)
+
+    def _lazy_resolve(self) -> object:
+        instance = _lazy_instance(self)
+        if instance is None:
+            instance = singleton.__new__(_lazy_cls(self), *_lazy_args(self), **_lazy_kwargs(self))
+            object.__setattr__(self, "_lazy_instance", instance)
+        return instance
+
+    def __getattribute__(self, name: str) -> object:
+        # __class__ answers isinstance checks without creating the instance.
+        if name == "__class__":
+            return _lazy_cls(self)
+        return getattr(_LazyProxy._lazy_resolve(self), name)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        setattr(_LazyProxy._lazy_resolve(self), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(_LazyProxy._lazy_resolve(self), name)
+
+    def __dir__(self) -> list[str]:
+        return dir(_LazyProxy._lazy_resolve(self))
+
+    def __repr__(self) -> str:
+        return repr(_LazyProxy._lazy_resolve(self))
+
+    def __str__(self) -> str:
+        return str(_LazyProxy._lazy_resolve(self))
+
+    def __eq__(self, other: object) -> bool:
+        return _LazyProxy._lazy_resolve(self) == other
+
+    def __hash__(self) -> int:
+        return hash(_LazyProxy._lazy_resolve(self))
+
+    def __bool__(self) -> bool:
+        return bool(_LazyProxy._lazy_resolve(self))
+
+    def __len__(self) -> int:
+        return len(_LazyProxy._lazy_resolve(self))
+
+    def __iter__(self) -> Iterator:
+        return iter(_LazyProxy._lazy_resolve(self))
+
+    def __contains__(self, item: object) -> bool:
+        return item in _LazyProxy._lazy_resolve(self)
+
+    def __getitem__(self, key: object) -> object:
+        return _LazyProxy._lazy_resolve(self)[key]
+
+    def __setitem__(self, key: object, value: object) -> None:
+        _LazyProxy._lazy_resolve(self)[key] = value
+
+    def __delitem__(self, key: object) -> None:
+        del _LazyProxy._lazy_resolve(self)[key]
+
+    def __call__(self, *args, **kwargs) -> object:
+        return _LazyProxy._lazy_resolve(self)(*args, **kwargs)
+
+    def __enter__(self) -> object:
+        return _LazyProxy._lazy_resolve(self).__enter__()
+
+    def __exit__(self, *args) -> object:
+        return _LazyProxy._lazy_resolve(self).__exit__(*args)
+
+
+# The slot getters, object.__getattribute__ would go through the proxy.
+_lazy_cls = _LazyProxy._lazy_cls.__get__
+_lazy_args = _LazyProxy._lazy_args.__get__
+_lazy_kwargs = _LazyProxy._lazy_kwargs.__get__
+_lazy_instance = _LazyProxy._lazy_instance.__get__
+
+
+class lazy_singleton (singleton):
+    """## Lazy singleton class.
+
+    Construction returns a proxy right away, the instance is created and initialized with the
+    arguments of the first construction when the proxy is first used, so code paths that never
+    use it never pay for it.
+
+    The proxy forwards attribute access and the common special methods, and reports the class
+    through __class__ so isinstance checks work without creating the instance.
+    """
+
+    def __new__(cls, *args, **kwargs) -> lazy_singleton:
+        proxy = cls.__dict__.get("_singleton_proxy")
+        if proxy is not None:
+            return proxy
+
+        if cls is lazy_singleton:
+            raise TypeError("Cannot instantiate base lazy_singleton class.")
+
+        with cls._singleton_lock:
+            proxy = cls.__dict__.get("_singleton_proxy")
+            if proxy is None:
+                proxy = _LazyProxy(cls, args, kwargs)
+                cls._singleton_proxy = proxy
+
+        return proxy
+
+    @classmethod
+    def _singleton_reset(cls) -> None:
+        with cls._singleton_lock:
+            super()._singleton_reset()
+            proxy = cls.__dict__.get("_singleton_proxy")
+            if proxy is not None:
+                object.__setattr__(proxy, "_lazy_instance", None)
+
+
+class thread_singleton (object):
+    """## Thread singleton class.
+
+    One instance per thread, for objects that are not thread-safe such as parsers or connection handles.
+    The __init__ is called once in each thread that constructs the class.
+    """
+
+    _singleton_init_method: MethodType
+    _singleton_local: threading.local
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        _singleton_capture_init(cls)
+        cls._singleton_local = threading.local()
+
+    def __new__(cls, *args, **kwargs) -> thread_singleton:
+        if cls is thread_singleton:
+            raise TypeError("Cannot instantiate base thread_singleton class.")
+
+        local = cls._singleton_local
+        instance = getattr(local, "instance", None)
+        if instance is not None:
+            return instance
+
+        instance = getattr(local, "pending", None)
+        if instance is not None:
+            return instance
+
+        local.pending = instance = object.__new__(cls)
+
+        try:
+            init = getattr(cls, "_singleton_init_method", None)
+            if init is not None:
+                init(instance, *args, **kwargs)
+
+        finally:
+            del local.pending
+
+        local.instance = instance
+        return instance
+
+
+class context_singleton (object):
+    """## Context singleton class.
+
+    One instance per contextvars context, for example per asyncio task.
+    Tasks copy the context of their creator, so a task shares the instances that already
+    existed when it was created and keeps the ones it creates to itself.
+    """
+
+    _singleton_init_method: MethodType
+    _singleton_var: contextvars.ContextVar
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        _singleton_capture_init(cls)
+        cls._singleton_var = contextvars.ContextVar(f"{cls.__qualname__}_singleton")
+
+    def __new__(cls, *args, **kwargs) -> context_singleton:
+        if cls is context_singleton:
+            raise TypeError("Cannot instantiate base context_singleton class.")
+
+        var = cls._singleton_var
+        instance = var.get(None)
+        if instance is not None:
+            return instance
+
+        # The instance is published before __init__ so that constructing the class again from it returns the pending instance.
+        instance = object.__new__(cls)
+        token = var.set(instance)
+
+        try:
+            init = getattr(cls, "_singleton_init_method", None)
+            if init is not None:
+                init(instance, *args, **kwargs)
+
+        except BaseException:
+            var.reset(token)
+            raise
+
+        return instance
+
+
+def _singleton_after_fork() -> None:
+    # Another thread may have held a lock at fork time, the child gets new ones.
+    for cls in list(_singleton_classes):
+        cls._singleton_lock = threading.RLock()
+
+        if "_singleton_pending" in cls.__dict__:
+            del cls._singleton_pending
+
+        if cls._singleton_fork_reset:
+            cls._singleton_reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_singleton_after_fork)
+
+
+_RECORD_TYPECODES = {int: "q", float: "d", "int": "q", "float": "d"}
+
+
+def _is_classvar(annotation: object) -> bool:
+    if isinstance(annotation, str):
+        return annotation.startswith(("ClassVar", "typing.ClassVar"))
+    # A ClassVar object can only exist once typing has been imported by someone.
+    typing = sys.modules.get("typing")
+    if typing is None:
+        return False
+    return annotation is typing.ClassVar or typing.get_origin(annotation) is typing.ClassVar
+
+
+class _RecordMeta (type):
+    """Builds the slots and the generated methods of record classes."""
+
+    def __new__(mcls, name: str, bases: tuple, namespace: dict, frozen: bool | None = None, **kwargs) -> type:
+        inherited = ()
+        defaults = {}
+        base_frozen = None
+        for base in bases:
+            if isinstance(base, _RecordMeta):
+                inherited += tuple(field for field in base._record_fields if field not in inherited)
+                defaults.update(base._record_defaults)
+                if base._record_fields:
+                    base_frozen = base._record_frozen
+
+        if frozen is None:
+            frozen = bool(base_frozen)
+        elif base_frozen is not None and frozen != base_frozen:
+            raise TypeError("Cannot mix frozen and mutable record classes.")
+
+        own = []
+        for field, annotation in namespace.get("__annotations__", {}).items():
+            if _is_classvar(annotation) or field in inherited:
+                continue
+            own.append(field)
+            if field in namespace:
+                default = namespace.pop(field)
+                if isinstance(default, (list, dict, set, bytearray)):
+                    raise ValueError(f"The default of field {field} is mutable.")
+                defaults[field] = default
+
+        fields = inherited + tuple(own)
+        seen_default = False
+        for field in fields:
+            if field in defaults:
+                seen_default = True
+            elif seen_default:
+                raise TypeError(f"Non-default field {field} follows a default field.")
+
+        namespace.setdefault("__slots__", tuple(own))
+        namespace["_record_fields"] = fields
+        namespace["_record_defaults"] = defaults
+        namespace["_record_frozen"] = frozen
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+
+        if fields:
+            for method, source in _record_methods(cls, fields, frozen).items():
+                if method not in namespace:
+                    setattr(cls, method, source)
+
+        return cls
+
+
+def _record_methods(cls: type, fields: tuple, frozen: bool) -> dict:
+    # The methods are generated as source so each one is a plain function without loops over the fields.
+    scope = {"_object_setattr": object.__setattr__, "FrozenInstanceError": FrozenInstanceError}
+    params = []
+    for field in fields:
+        if field in cls._record_defaults:
+            scope[f"_default_{field}"] = cls._record_defaults[field]
+            params.append(f"{field}=_default_{field}")
+        else:
+            params.append(field)
+
+    if frozen:
+        # The slot descriptors write past the __setattr__ that forbids assignment.
+        for field in fields:
+            scope[f"_set_{field}"] = getattr(cls, field).__set__
+        body = "".join(f"    _set_{field}(self, {field})\n" for field in fields)
+    else:
+        body = "".join(f"    self.{field} = {field}\n" for field in fields)
+
+    values = "".join(f"self.{field}, " for field in fields)
+    others = "".join(f"other.{field}, " for field in fields)
+    shown = ", ".join(f"{field}={{self.{field}!r}}" for field in fields)
+
+    source = (
+        f"def __init__(self, {', '.join(params)}):\n{body}"
+        f"def __eq__(self, other):\n"
+        f"    if other.__class__ is self.__class__:\n"
+        f"        return ({values}) == ({others})\n"
+        f"    return NotImplemented\n"
+        f"def __repr__(self):\n"
+        f"    return f\"{{self.__class__.__qualname__}}({shown})\"\n"
+        f"def __reduce__(self):\n"
+        f"    return (self.__class__, ({values}))\n"
+        f"def _astuple(self):\n"
+        f"    return ({values})\n"
+    )
+
+    if frozen:
+        source += (
+            f"def __hash__(self):\n"
+            f"    return hash(({values}))\n"
+            f"def __setattr__(self, name, value):\n"
+            f"    raise FrozenInstanceError(f\"Cannot assign to field {{name}}.\")\n"
+            f"def __delattr__(self, name):\n"
+            f"    raise FrozenInstanceError(f\"Cannot delete field {{name}}.\")\n"
+        )
+
+    exec(source, scope)
+    methods = {name: scope[name] for name in ("__init__", "__eq__", "__repr__", "__reduce__", "_astuple")}
+    # Mutable records compare by value, so like dataclasses they are not hashable.
+    methods["__hash__"] = scope["__hash__"] if frozen else None
+    if frozen:
+        methods["__setattr__"] = scope["__setattr__"]
+        methods["__delattr__"] = scope["__delattr__"]
+
+    for method in methods.values():
+        if method is not None:
+            method.__qualname__ = f"{cls.__qualname__}.{method.__name__}"
+
+    return methods
+
+
+class FrozenInstanceError (AttributeError):
+    """Assignment to a field of a frozen record."""
+
+
+class record (metaclass=_RecordMeta):
+    """## Record class.
+
+    A compact value object, the annotated fields become __slots__ and __init__, __eq__,
+    __hash__ and __repr__ are generated for them. Class attributes of annotated fields are
+    their defaults and move to _record_defaults.
+
+    Declare the class with `frozen=True` to make instances immutable and hashable,
+    mutable records are not hashable.
+    """
+
+    __slots__ = ()
+
+    # _RecordMeta sets _record_fields, _record_defaults and _record_frozen on every record class,
+    # they are not annotated here since annotations declare the fields.
 
     def __init__(self, *args, **kwargs) -> None:
-        cls = self.__class__
-        if not hasattr(cls, "_singleton_initialized") or not cls._singleton_initialized:
-            cls._singleton_initialized = True
-            self._singleton_init_method(*args, **kwargs)
+        # Replaced by the generated __init__ in every record class with fields.
+        raise TypeError("Cannot instantiate base record class.")
+
+
+class RecordArray (object):
+    """## Record array.
+
+    Columnar container for many records of one class, int and float fields are stored in
+    `array.array` columns and other fields in lists. Records are built on access.
+    """
+
+    def __init__(self, cls: type, records: Iterable = (), typecodes: dict[str, str] | None = None) -> None:
+        if not isinstance(cls, _RecordMeta) or cls is record:
+            raise TypeError("The cls is not a record class.")
+
+        hints = {}
+        for klass in reversed(cls.__mro__):
+            hints.update(klass.__dict__.get("__annotations__", {}))
+
+        self.cls = cls
+        self.fields = cls._record_fields
+        self.columns = {}
+        for field in self.fields:
+            typecode = (typecodes or {}).get(field, _RECORD_TYPECODES.get(hints.get(field)))
+            self.columns[field] = list() if typecode is None else array.array(typecode)
+
+        self.extend(records)
+
+    def __len__(self) -> int:
+        return len(self.columns[self.fields[0]]) if self.fields else 0
+
+    def __getitem__(self, index: int | slice) -> object:
+        if isinstance(index, slice):
+            result = object.__new__(type(self))
+            result.cls = self.cls
+            result.fields = self.fields
+            result.columns = {field: column[index] for field, column in self.columns.items()}
+            return result
+
+        return self.cls(*[column[index] for column in self.columns.values()])
+
+    def __iter__(self) -> Iterator:
+        cls = self.cls
+        for values in zip(*self.columns.values()):
+            yield cls(*values)
+
+    def append(self, item: object) -> None:
+        values = item._astuple() if isinstance(item, self.cls) else tuple(item)
+        if len(values) != len(self.fields):
+            raise TypeError(f"Expected {len(self.fields)} values, got {len(values)}.")
+
+        # A value rejected by an array column leaves every column at its previous length.
+        length = len(self)
+        try:
+            for column, value in zip(self.columns.values(), values):
+                column.append(value)
+
+        except BaseException:
+            for column in self.columns.values():
+                del column[length:]
+            raise
+
+    def extend(self, items: Iterable) -> None:
+        for item in items:
+            self.append(item)
+
+    def column(self, field: str) -> array.array | list:
+        return self.columns[field]
+
+    def nbytes(self) -> int:
+        """Size of the array columns, list columns count their pointers only."""
+        return sum(column.itemsize * len(column) if isinstance(column, array.array) else 8 * len(column) for column in self.columns.values())
+
+
+# The names of typing, types and abc used to be star imported here, they are still
+# reachable as typex attributes but the modules are only imported on first use.
+_FORWARDED_MODULES = ("typing", "types", "abc")
+
+
+def __getattr__(name: str) -> object:
+    if not name.startswith("_"):
+        for module_name in _FORWARDED_MODULES:
+            module = __import__(module_name)
+            exported = getattr(module, "__all__", None)
+            if name in exported if exported is not None else hasattr(module, name):
+                value = getattr(module, name)
+                globals()[name] = value
+                return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "static",
     "abstract",
     "abstractmethod",
-    "singleton"
+    "singleton",
+    "lazy_singleton",
+    "thread_singleton",
+    "context_singleton",
+    "record",
+    "FrozenInstanceError",
+    "RecordArray"
 ]
@@ -4,9 +4,14 @@
 
 # std
 import os
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
 # tests
+import dirstruct
 from dirstruct import *
 
 
@@ -35,3 +40,318 @@ class TestDirectory (unittest.TestCase):
         self.assertEqual(cwd, abscwd)
         self.assertEqual(cwd.file, file_name)
         self.assertEqual(abscwd.file, os.path.join(current_working_directory, file_name))
+
+
+    def test_created_registry(self):
+        class TestDirectoryRegistry (Directory):
+            folder_registry = "folder_registry"
+
+        cwd = TestDirectoryRegistry()
+        path = cwd.folder_registry
+
+        with mock.patch("os.makedirs") as makedirs:
+            cwd.folder_registry
+            cwd.folder_registry
+            makedirs.assert_not_called()
+
+        os.rmdir(path)
+        cwd.folder_registry
+        self.assertFalse(os.path.isdir(path))
+
+        self.assertEqual(recheck(), [path])
+        cwd.folder_registry
+        self.assertTrue(os.path.isdir(path))
+
+        invalidate(path)
+        with mock.patch("os.makedirs") as makedirs:
+            cwd.folder_registry
+            makedirs.assert_called_once()
+
+        os.rmdir(path)
+        invalidate()
+
+
+    def test_materialize(self):
+        with tempfile.TemporaryDirectory() as root:
+            class TestDirectoryTree (Directory):
+                class cache (Directory):
+                    tmp = "tmp"
+                    index = FilePath("index.db")
+
+                logs = "logs"
+                config = FilePath("config.json")
+
+            tree = TestDirectoryTree(root)
+            paths = tree._materialize_()
+
+            self.assertEqual(set(paths), {"cache", "cache.tmp", "cache.index", "logs", "config"})
+            self.assertEqual(paths["cache.tmp"], os.path.join(root, "cache", "tmp"))
+            self.assertEqual(paths["config"], os.path.join(root, "config.json"))
+            self.assertTrue(os.path.isdir(paths["cache.tmp"]))
+            self.assertTrue(os.path.isdir(paths["logs"]))
+            self.assertFalse(os.path.exists(paths["cache.index"]))
+            self.assertEqual(set(object.__getattribute__(tree, "_resolved_")), {"cache", "logs", "config"})
+
+            with self.assertRaises(TypeError):
+                paths["logs"] = root
+
+        invalidate()
+
+
+    def test_dispatch(self):
+        class TestDirectoryDispatch (Directory):
+            _makedirs_ = False
+            logs = "logs"
+            index = FilePath("index.db")
+
+        root = os.path.join("root")
+        cwd = TestDirectoryDispatch(root)
+
+        self.assertEqual(cwd.upper(), "ROOT")
+        self.assertEqual(cwd.index, os.path.join(root, "index.db"))
+        self.assertIs(cwd.index, cwd.index)
+
+        cwd.logs = "other"
+        self.assertEqual(cwd.logs, os.path.join(root, "other"))
+
+        cwd.extra = FilePath("extra.txt")
+        self.assertEqual(cwd.extra, os.path.join(root, "extra.txt"))
+
+        with self.assertRaises(AttributeError):
+            cwd.missing
+
+
+    def test_concurrent_resolution(self):
+        with tempfile.TemporaryDirectory() as root:
+            class TestDirectoryConcurrent (Directory):
+                class cache (Directory):
+                    tmp = "tmp"
+
+            cwd = TestDirectoryConcurrent(root)
+            barrier = threading.Barrier(16)
+            results = []
+
+            def worker():
+                barrier.wait()
+                results.append(cwd.cache.tmp)
+                results.append(cwd.cache)
+
+            with mock.patch("os.makedirs", wraps=os.makedirs) as makedirs:
+                threads = [threading.Thread(target=worker) for _ in range(16)]
+                for thread in threads: thread.start()
+                for thread in threads: thread.join()
+
+            self.assertEqual(makedirs.call_count, 2)
+            self.assertEqual(len({id(value) for value in results}), 2)
+            self.assertTrue(os.path.isdir(os.path.join(root, "cache", "tmp")))
+
+        invalidate()
+
+
+    def test_missing_names(self):
+        class TestDirectoryMissing (Directory):
+            _makedirs_ = False
+            logs = "logs"
+
+        cwd = TestDirectoryMissing("root")
+        state = dict(vars(cwd))
+
+        # Lookups of missing and internal names leave nothing behind on a long-lived instance.
+        for index in range(100):
+            with self.assertRaises(AttributeError):
+                getattr(cwd, f"missing_{index}")
+
+            cwd._internal_ = index
+
+        self.assertEqual(set(vars(cwd)) - set(state), {"_internal_"})
+        self.assertEqual(object.__getattribute__(cwd, "_resolved_"), {})
+
+
+    def test_assignment_during_resolution(self):
+        class TestDirectoryGeneration (Directory):
+            _makedirs_ = False
+            logs = "logs"
+
+        root = os.path.join("root")
+        cwd = TestDirectoryGeneration(root)
+        resolve = dirstruct._resolve
+
+        def resolve_then_assign(directory, name):
+            result = resolve(directory, name)
+            directory._include_ = False
+            return result
+
+        with mock.patch("dirstruct._resolve", side_effect=resolve_then_assign):
+            self.assertEqual(cwd.logs, os.path.join(root, "logs"))
+
+        # The entry computed before the assignment is not served afterwards.
+        self.assertNotIn("logs", object.__getattribute__(cwd, "_resolved_"))
+
+
+    def test_inventory(self):
+        with tempfile.TemporaryDirectory() as root:
+            class TestDirectoryInventory (Directory):
+                class cache (Directory):
+                    tmp = "tmp"
+
+                logs = "logs"
+
+            cwd = TestDirectoryInventory(root)
+
+            for path, size, mtime in ((cwd.cache.tmp, 10, 1000), (cwd.cache.tmp, 20, 2000), (cwd.logs, 5, 3000)):
+                name = os.path.join(path, f"file_{size}")
+                with open(name, "wb") as fobj:
+                    fobj.write(b"x" * size)
+                os.utime(name, (mtime, mtime))
+
+            for path in (cwd.cache.tmp, cwd.cache, cwd.logs, root):
+                os.utime(path, (1000, 1000))
+
+            result = cwd._inventory_()
+
+            self.assertEqual(result[""], Inventory(3, 35, 1000, 3000))
+            self.assertEqual(result["cache"], Inventory(2, 30, 1000, 2000))
+            self.assertEqual(result["cache.tmp"], Inventory(2, 30, 1000, 2000))
+            self.assertEqual(result["logs"], Inventory(1, 5, 3000, 3000))
+
+            with open(os.path.join(cwd.logs, "file_new"), "wb") as fobj:
+                fobj.write(b"x" * 7)
+
+            with mock.patch("os.scandir", wraps=os.scandir) as scandir:
+                total = get_index(cwd).refresh(workers=2)
+                scandir.assert_called_once_with(os.path.normpath(cwd.logs))
+
+            self.assertEqual(total.files, 4)
+            self.assertEqual(total.size, 42)
+
+        invalidate()
+
+
+    def test_evictor(self):
+        with tempfile.TemporaryDirectory() as root:
+            class TestDirectoryRetention (Directory):
+                class cache (Directory):
+                    _retention_ = RetentionPolicy(max_bytes=25, max_age=10 ** 9)
+
+                logs = "logs"
+
+            cwd = TestDirectoryRetention(root)
+            now = time.time()
+
+            for index, mtime in enumerate((now - 300, now - 200, now - 100, 1)):
+                name = os.path.join(cwd.cache, f"file_{index}")
+                with open(name, "wb") as fobj:
+                    fobj.write(b"x" * 10)
+                os.utime(name, (mtime, mtime))
+
+            with open(os.path.join(cwd.logs, "kept"), "wb") as fobj:
+                fobj.write(b"x" * 100)
+
+            evictor = Evictor(cwd, batch=10)
+            removed = evictor.enforce()
+
+            self.assertEqual(sorted(os.path.basename(path) for path in removed), ["file_0", "file_3"])
+            self.assertEqual(sorted(os.listdir(cwd.cache)), ["file_1", "file_2"])
+            self.assertEqual(evictor.enforce(), [])
+            self.assertTrue(os.path.isfile(os.path.join(cwd.logs, "kept")))
+
+            evictor.start()
+            evictor.stop(5)
+
+        invalidate()
+
+
+    def test_evictor_failures(self):
+        with tempfile.TemporaryDirectory() as root:
+            class TestDirectoryFailures (Directory):
+                class cache (Directory):
+                    _retention_ = RetentionPolicy(max_files=3)
+
+            cwd = TestDirectoryFailures(root)
+
+            def write(name, mtime):
+                path = os.path.join(cwd.cache, name)
+                with open(path, "wb") as fobj:
+                    fobj.write(b"x")
+                os.utime(path, (mtime, mtime))
+                return path
+
+            names = [write(f"file_{index}", 1000 + index) for index in range(5)]
+            os.utime(cwd.cache, (1000, 1000))
+            evictor = Evictor(cwd)
+            remove = dirstruct._remove
+
+            # Someone else removes file_1 during the cycle, it counts as gone and file_2 is kept.
+            def remove_and_race(path):
+                if path == names[0]:
+                    os.remove(names[1])
+                return remove(path)
+
+            with mock.patch("dirstruct._remove", side_effect=remove_and_race):
+                self.assertEqual(evictor.enforce(), [names[0]])
+
+            self.assertEqual(sorted(os.listdir(cwd.cache)), ["file_2", "file_3", "file_4"])
+
+            # A failed remove leaves the directory unchanged, the file is retried by the next cycle.
+            oldest = write("file_old", 500)
+            os.utime(cwd.cache, (2000, 2000))
+
+            with mock.patch("dirstruct._remove", return_value=False):
+                self.assertEqual(evictor.enforce(), [])
+
+            self.assertEqual(evictor.enforce(), [oldest])
+
+        invalidate()
+
+
+    def test_evictor_incremental(self):
+        with tempfile.TemporaryDirectory() as root:
+            class TestDirectoryIncremental (Directory):
+                class cache (Directory):
+                    _retention_ = RetentionPolicy(max_files=5)
+                    a = "a"
+                    b = "b"
+                    c = "c"
+
+            cwd = TestDirectoryIncremental(root)
+
+            def write(path, name, mtime):
+                name = os.path.join(path, name)
+                with open(name, "wb") as fobj:
+                    fobj.write(b"x")
+                os.utime(name, (mtime, mtime))
+
+            for index in range(3):
+                write(cwd.cache.a, f"file_{index}", 1000 + index)
+                write(cwd.cache.c, f"file_{index}", 5000 + index)
+
+            write(cwd.cache.a, "file_3", 1003)
+
+            for path, mtime in ((cwd.cache.a, 1000), (cwd.cache.b, 1000), (cwd.cache.c, 1000), (cwd.cache, 1000)):
+                os.utime(path, (mtime, mtime))
+
+            evictor = Evictor(cwd)
+            self.assertEqual([os.path.basename(path) for path in evictor.enforce()], ["file_0", "file_1"])
+
+            index = get_index(cwd.cache)
+            serial, paths = index.changes(-1)
+            self.assertIsNone(paths)
+
+            write(cwd.cache.b, "file_old", 500)
+            write(cwd.cache.b, "file_new", 9000)
+            os.utime(cwd.cache.a, (1500, 1500))
+            os.utime(cwd.cache.b, (2000, 2000))
+
+            # Only the rescanned directories are read again, c and the cache itself are not.
+            with mock.patch.object(DirectoryIndex, "_listings", autospec=True, side_effect=DirectoryIndex._listings) as listings:
+                removed = evictor.enforce()
+
+            listings.assert_called_once()
+            self.assertEqual(sorted(listings.call_args.args[1]), sorted([cwd.cache.a, cwd.cache.b]))
+            self.assertEqual(removed, [os.path.join(cwd.cache.b, "file_old"), os.path.join(cwd.cache.a, "file_2")])
+
+            current, paths = index.changes(serial)
+            self.assertEqual(sorted(paths), sorted([cwd.cache.a, cwd.cache.b]))
+            self.assertEqual(index.changes(current), (current, []))
+
+        invalidate()
@@ -0,0 +1,115 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# unit test
+
+# std
+import os
+import sys
+import typing
+import inspect
+import tempfile
+import unittest
+import importlib
+import statistics
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Modules that must not be loaded by importing the key, they are deferred to first use.
+DEFERRED = {
+    "typex": ("typing", "re"),
+    "threadextra": ("ctypes", "inspect", "asyncio", "concurrent.futures", "logging"),
+    "internationalization": ("strutils", "typing", "re"),
+    "osenvutils": ("subprocess", "locale", "typing", "re"),
+    "dirstruct": ("inspect", "concurrent.futures"),
+}
+
+# The cold import of a module may take at most this many times the cold import of REFERENCE,
+# a stdlib module timed the same way, so the budget follows the speed of the machine.
+REFERENCE = "typing"
+BUDGET = 5
+ROUNDS = 5
+
+
+def importtime(module: str) -> dict[str, int]:
+    """Run `-X importtime` in a fresh process, returns the cumulative microseconds of each imported module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    modules = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+
+    return modules
+
+
+def cold_import(module: str, env: dict) -> float:
+    """Median seconds a fresh process spends importing the module, after a first run has cached its bytecode."""
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    samples = []
+
+    for _ in range(ROUNDS + 1):
+        result = subprocess.run([sys.executable, "-c", code], cwd=SRC, env=env, capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout))
+
+    return statistics.median(samples[1:])
+
+
+class TestImportTime (unittest.TestCase):
+    def test_deferred_imports(self):
+        for module, deferred in DEFERRED.items():
+            with self.subTest(module=module):
+                modules = importtime(module)
+                self.assertIn(module, modules)
+                self.assertEqual([name for name in deferred if name in modules], [])
+
+    def test_star_import(self):
+        # A star import must not compute the lazy osenvutils variables.
+        code = "import sys; from osenvutils import *; print(*(name in sys.modules for name in ('subprocess', 'locale')))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ["False", "False"])
+
+    def test_cold_import(self):
+        with tempfile.TemporaryDirectory() as prefix:
+            # Bytecode is cached as in a deployed service, even if the environment disables it.
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=prefix)
+            env.pop("PYTHONDONTWRITEBYTECODE", None)
+            reference = cold_import(REFERENCE, env)
+
+            for module in DEFERRED:
+                with self.subTest(module=module):
+                    self.assertLess(cold_import(module, env), BUDGET * reference)
+
+    def test_type_hints(self):
+        # The annotations must resolve although the modules no longer import typing.
+        for name in DEFERRED:
+            module = importlib.import_module(name)
+
+            for obj in vars(module).values():
+                if getattr(obj, "__module__", None) != name:
+                    continue
+
+                targets = [obj]
+
+                if inspect.isclass(obj):
+                    targets += [getattr(member, "__func__", member) for member in vars(obj).values()]
+
+                for target in targets:
+                    if inspect.isclass(target) or inspect.isfunction(target):
+                        with self.subTest(module=name, target=target.__qualname__):
+                            typing.get_type_hints(target)
+
+    def test_forwarded_names(self):
+        code = "import typex, typing, types, abc; print(typex.Optional is typing.Optional, typex.MethodType is types.MethodType, typex.ABCMeta is abc.ABCMeta)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ["True", "True", "True"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# unit test
+
+# std
+import os
+import tempfile
+import unittest
+
+# tests
+from internationalization import *
+
+
+class TestInternationalization (unittest.TestCase):
+    def create(self) -> Internationalization:
+        i18n = Internationalization()
+        i18n._con_add_value("en_US", "hello", "Hello")
+        i18n._con_add_value("en_US", "world", "World")
+        i18n._con_add_value("zh_CN", "hello", "你好")
+        i18n._con_set_lang("zh_CN")
+        return i18n
+
+
+    def test_value(self):
+        i18n = self.create()
+
+        self.assertEqual(i18n.hello, "你好")
+        self.assertEqual(i18n.world, "World")
+        self.assertEqual(i18n.missing.key, "missing.key")
+        self.assertIsNone(i18n._con_get_stats())
+
+
+    def test_stats(self):
+        i18n = self.create()
+        i18n._con_set_stats(True, capacity=2)
+
+        i18n.hello
+        i18n.world
+        i18n.world
+        i18n.key_a
+        i18n.key_a
+        i18n.key_b
+        i18n.key_c
+
+        stats = i18n._con_get_stats()
+
+        self.assertEqual(stats["lookups"], 7)
+        self.assertEqual(stats["hits"], {"zh_CN": 1, "en_US": 2})
+        self.assertEqual(stats["base_fallbacks"], 2)
+        self.assertEqual(stats["self_fallbacks"], 4)
+        self.assertEqual(len(stats["missing"]), 2)
+        self.assertEqual(stats["missing"]["key_a"], 2)
+        self.assertEqual(sum(stats["latency_ns"]["self"].values()), 4)
+
+        i18n._con_reset_stats()
+        self.assertEqual(i18n._con_get_stats()["lookups"], 0)
+
+        i18n._con_set_stats(False)
+        self.assertIsNone(i18n._con_get_stats())
+
+
+    def test_load_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "en_US.lang")
+            with open(path, "w", encoding="utf-8") as fobj:
+                fobj.write('quote = "say \\"hi\\"\\t\\u4f60"\n')
+                fobj.write('lines = first +\\\n')
+                fobj.write('        "second"\n')
+
+            i18n = Internationalization()
+            i18n._con_load_file(path)
+
+        self.assertEqual(i18n.quote, 'say "hi"\t你')
+        self.assertEqual(i18n.lines, "first\nsecond")
+
+
+    def test_sformat(self):
+        i18n = Internationalization()
+        i18n._con_add_value("en_US", "greet", "Hello {0}, you are {age}.")
+
+        self.assertEqual(i18n.greet.sformat("Alice", age=20), "Hello Alice, you are 20.")
+        self.assertEqual(i18n.greet.sformat("Alice"), "Hello Alice, you are {age}.")
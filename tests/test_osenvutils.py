@@ -0,0 +1,144 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# unit test
+
+# std
+import sys
+import time
+import datetime
+import importlib
+import threading
+import unittest
+from unittest import mock
+
+# tests
+import osenvutils
+
+
+class TestLazyVariables (unittest.TestCase):
+    def test_lazy(self):
+        module = importlib.reload(osenvutils)
+
+        self.assertNotIn("UUID", vars(module))
+        self.assertIsInstance(module.UUID, str)
+        self.assertIn("UUID", vars(module))
+        self.assertIsInstance(module.ENCODING, str)
+
+        with self.assertRaises(AttributeError):
+            module.NOT_A_VARIABLE
+
+
+    @unittest.skipUnless(sys.platform == "linux", "linux only")
+    def test_uuid_without_subprocess(self):
+        with mock.patch("subprocess.check_output", side_effect=AssertionError) as check_output:
+            osenvutils.get_system_uuid()
+            check_output.assert_not_called()
+
+
+
+class TestDateTimeVariable (unittest.TestCase):
+    def test_snapshot(self):
+        now = datetime.datetime(2024, 1, 2, 3, 4, 5, 6789)
+        snapshot = osenvutils.DateTimeSnapshot(now)
+        timestamp_ms = int(now.timestamp() * 1000)
+
+        self.assertEqual(snapshot.date, "2024-01-02")
+        self.assertEqual(snapshot.time, "03:04:05")
+        self.assertEqual(snapshot.microsecond, "006789")
+        self.assertEqual(snapshot.timestamp_ms, timestamp_ms)
+        self.assertEqual(snapshot.timestamp_ms_hex, hex(timestamp_ms))
+        self.assertEqual(snapshot.timestamp_ms_hex_up, "0x" + hex(timestamp_ms)[2:].upper())
+        self.assertEqual(snapshot.timestamp_ms_hex_simple_up, hex(timestamp_ms)[2:].upper())
+        self.assertIs(snapshot.date, snapshot.date)
+
+        with self.assertRaises(AttributeError):
+            snapshot.not_a_field
+
+
+    def test_variable(self):
+        variable = osenvutils.DateTimeVariable()
+
+        self.assertIsNot(variable.snapshot(), variable.snapshot())
+        self.assertEqual(len(variable.date), 10)
+        self.assertAlmostEqual(variable.timestamp, time.time(), delta=2)
+
+
+    def test_cached_clock(self):
+        variable = osenvutils.DateTimeVariable(resolution=0.05)
+        snapshot = variable.snapshot()
+
+        self.assertIs(variable.snapshot(), snapshot)
+        time.sleep(0.06)
+        self.assertIsNot(variable.snapshot(), snapshot)
+
+
+
+class TestDateTimeFormatter (unittest.TestCase):
+    def test_hex(self):
+        formatter = osenvutils.DateTimeFormatter
+
+        for value in (0, 1, 255, 0x6AD61D12, 1792417042113027, -5):
+            legacy = hex(value)
+            legacy_up = legacy.upper().replace("X", "x")
+
+            self.assertEqual(formatter.hex(value), legacy)
+            self.assertEqual(formatter.hex(value, upper=True), legacy_up)
+            self.assertEqual(formatter.hex(value, simple=True), legacy.replace("0x", ""))
+            self.assertEqual(formatter.hex(value, upper=True, simple=True), legacy_up.replace("0x", ""))
+
+
+    def test_strftime(self):
+        formatter = osenvutils.DateTimeFormatter()
+
+        for now in (datetime.datetime(1999, 1, 1), datetime.datetime(2024, 12, 31, 23, 59, 59, 999999), datetime.datetime(2025, 1, 1)):
+            self.assertEqual(formatter.date(now), now.strftime("%Y-%m-%d"))
+            self.assertEqual(formatter.time(now), now.strftime("%H:%M:%S"))
+            self.assertEqual(formatter.microsecond(now), now.strftime("%f"))
+
+
+
+class TestTiming (unittest.TestCase):
+    def test_stopwatch(self):
+        with osenvutils.Stopwatch() as stopwatch:
+            time.sleep(0.01)
+
+        elapsed = stopwatch.elapsed()
+        self.assertFalse(stopwatch.running())
+        self.assertGreaterEqual(elapsed, 10 ** 7)
+        self.assertEqual(stopwatch.elapsed(), elapsed)
+
+
+    def test_histogram(self):
+        histogram = osenvutils.Histogram()
+
+        def worker(offset):
+            for value in range(1, 1001):
+                histogram.record(value * 1000 + offset)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 4000)
+        self.assertAlmostEqual(summary["p50"], 500_000, delta=500_000 * 0.07)
+        self.assertAlmostEqual(summary["p99"], 990_000, delta=990_000 * 0.07)
+        self.assertEqual(summary["max"], 1_000_003)
+
+        # The shards of the exited threads were folded, the totals are kept.
+        self.assertEqual(histogram._Histogram__shards, [])
+        histogram.record(7)
+        self.assertEqual(histogram.count(), 4001)
+        self.assertEqual(histogram.summary()["max"], 1_000_003)
+
+        histogram.reset()
+        self.assertEqual(histogram.count(), 0)
+        self.assertEqual(histogram.percentile(50), 0)
+
+
+    def test_section(self):
+        with osenvutils.section("test.section"):
+            pass
+
+        self.assertIs(osenvutils.get_histogram("test.section"), osenvutils.get_histogram("test.section"))
+        self.assertEqual(osenvutils.timing_report()["test.section"]["count"], 1)
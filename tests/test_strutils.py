@@ -0,0 +1,133 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# unit test
+
+# std
+import random
+import unittest
+
+# tests
+from strutils import *
+
+
+def reference_escape_character_recognition(value: str) -> str:
+    # The original implementation, kept to check that the semantics did not change.
+    table = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+    _input = value
+    output = ""
+
+    while True:
+        result = _input.find("\\")
+        if result == -1:
+            output += _input
+            break
+
+        output += _input[:result]
+        _input = _input[result+1:]
+
+        if not _input:
+            output += "\\"
+            break
+
+        if _input[0] not in table:
+            output += "\\"
+            continue
+
+        output += table[_input[0]]
+        _input = _input[1:]
+
+    return output
+
+
+class TestEscapeCharacterRecognition (unittest.TestCase):
+    def test_basic(self):
+        self.assertEqual(escape_character_recognition("plain"), "plain")
+        self.assertEqual(escape_character_recognition(r"a\nb\tc\rd"), "a\nb\tc\rd")
+        self.assertEqual(escape_character_recognition(r"a\\nb"), "a\\nb")
+        self.assertEqual(escape_character_recognition(r"a\qb"), r"a\qb")
+        self.assertEqual(escape_character_recognition("tail\\"), "tail\\")
+        self.assertEqual(escape_character_recognition("\\\n"), "\\\n")
+
+
+    def test_reference(self):
+        rand = random.Random(0)
+        alphabet = "\\\\\\ntrxq\n\x00"
+
+        for _ in range(2000):
+            value = "".join(rand.choice(alphabet) for _ in range(rand.randint(0, 16)))
+            self.assertEqual(escape_character_recognition(value), reference_escape_character_recognition(value))
+
+
+class TestEscapeCodec (unittest.TestCase):
+    def test_decode(self):
+        self.assertEqual(escape_decode(r'\"a\"\0\x41\u4f60\U0001f600'), '"a"\0A你😀')
+        self.assertEqual(escape_decode(r"\q\xZZ\u12\U00110000"), r"\q\xZZ\u12\U00110000")
+        self.assertEqual(escape_decode("tail\\"), "tail\\")
+
+
+    def test_encode(self):
+        value = 'a\n"b"\\c\0 你😀'
+
+        self.assertEqual(escape_encode(value), 'a\\n\\"b\\"\\\\c\\0 你😀')
+        self.assertEqual(escape_encode(value, ascii_only=True), 'a\\n\\"b\\"\\\\c\\0 \\u4f60\\U0001f600')
+        self.assertEqual(escape_decode(escape_encode(value)), value)
+        self.assertEqual(escape_decode(escape_encode(value, ascii_only=True)), value)
+
+
+    def test_custom_table(self):
+        table = {"s": " ", "\\": "\\"}
+        codec = get_escape_codec(table, numeric=False)
+
+        self.assertIs(codec, get_escape_codec(dict(table), numeric=False))
+        self.assertEqual(codec.decode(r"a\sb\n\x41"), r"a b\n\x41")
+        self.assertEqual(codec.encode("a b\\"), r"a\sb\\")
+
+        with self.assertRaises(ValueError):
+            get_escape_codec({"n": "\n"}).encode("a")
+
+        with self.assertRaises(ValueError):
+            get_escape_codec({"nn": "\n"})
+
+
+class TestEscapeBatch (unittest.TestCase):
+    def test_batch(self):
+        values = ["plain", r"a\nb", "tail\\", r"\x1e", "", r"你"]
+        expected = [escape_decode(value) for value in values]
+
+        self.assertEqual(escape_decode_batch(values), expected)
+        self.assertEqual(escape_decode_batch(iter(values)), expected)
+        self.assertEqual(escape_decode_batch(["a", "b"]), ["a", "b"])
+        self.assertEqual(escape_decode_batch([]), [])
+
+
+    def test_separator(self):
+        values = ["a\x1eb", r"\n"]
+        self.assertEqual(escape_decode_batch(values), ["a\x1eb", "\n"])
+
+
+    def test_iter(self):
+        values = [f"line {index}\\t{index}" for index in range(3000)]
+        result = escape_decode_iter(value for value in values)
+
+        self.assertNotIsInstance(result, list)
+        self.assertEqual(list(result), [escape_decode(value) for value in values])
+
+
+class TestTemplate (unittest.TestCase):
+    def test_render(self):
+        self.assertEqual(format_template("{0} + {1} = {result}", 1, 2, result=3), "1 + 2 = 3")
+        self.assertEqual(format_template("{0}{0}", "ab"), "abab")
+        self.assertEqual(format_template("{{0}} {{{0}}}", 1), "{0} {1}")
+        self.assertEqual(format_template("{missing} {1} { x }", 0), "{missing} {1} { x }")
+        self.assertEqual(format_template("no fields }}"), "no fields }")
+        self.assertEqual(format_template("x {²} {٣} y", 1, 2, 3, 4), "x {²} {٣} y")
+        self.assertEqual(format_template("{²}", **{"²": "sq"}), "sq")
+        self.assertEqual(format_template("{user.name} {a-b} { x }", **{"user.name": "n", "a-b": 1, " x ": 2}), "n 1 2")
+
+
+    def test_cache(self):
+        self.assertIs(compile_template("cached {0}"), compile_template("cached {0}"))
+
+        template = Template("{name}: {0}")
+        self.assertEqual(template.render("value", name="key"), "key: value")
+        self.assertEqual(template.render(), "{name}: {0}")
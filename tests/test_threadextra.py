@@ -0,0 +1,379 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# unit test
+
+# std
+import time
+import queue
+import asyncio
+import threading
+import unittest
+
+# tests
+from threadextra import *
+
+
+def busy(seconds: float) -> float:
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        ...
+
+    return seconds
+
+
+
+class TestCancellationToken (unittest.TestCase):
+    def test_primitives(self):
+        token = CancellationToken()
+        event = threading.Event()
+        q = queue.Queue()
+
+        self.assertFalse(token.wait_event(event, 0.01))
+        event.set()
+        self.assertTrue(token.wait_event(event, 0.01))
+
+        q.put(1)
+        self.assertEqual(token.queue_get(q, 0.01), 1)
+
+        with self.assertRaises(queue.Empty):
+            token.queue_get(q, 0.01)
+
+        start = time.monotonic()
+        token.sleep(0.02)
+        self.assertGreaterEqual(time.monotonic() - start, 0.02)
+
+        token.cancel()
+        self.assertTrue(token.cancelled())
+
+        for call in (lambda: token.sleep(1), lambda: token.wait_event(threading.Event()), lambda: token.queue_get(q)):
+            with self.assertRaises(Cancelled):
+                call()
+
+
+    def test_unsupported(self):
+        token = CancellationToken()
+
+        with self.assertRaises(TypeError):
+            token.queue_get(queue.SimpleQueue(), 0.01)
+
+        with self.assertRaises(TypeError):
+            token.wait_event(asyncio.Event(), 0.01)
+
+        # Subclasses of queue.Queue are supported.
+        lifo = queue.LifoQueue()
+        lifo.put(1)
+        lifo.put(2)
+        self.assertEqual(token.queue_get(lifo, 0.01), 2)
+
+
+    def test_wakeup(self):
+        results = []
+        event = threading.Event()
+        q = queue.Queue()
+
+        def target(wait):
+            try:
+                wait(current_token())
+
+            except Cancelled as _:
+                results.append(time.monotonic())
+
+        waits = [lambda token: token.sleep(10), lambda token: token.wait_event(event), lambda token: token.queue_get(q)]
+        threads = [ThreadExtra(target=target, args=(wait,)) for wait in waits]
+
+        for thread in threads:
+            thread.start()
+
+        time.sleep(0.05)
+        start = time.monotonic()
+
+        for thread in threads:
+            self.assertTrue(thread.cancel(timeout=5))
+
+        self.assertEqual(len(results), 3)
+        self.assertLess(max(results) - start, 1)
+
+
+    def test_subclass_run(self):
+        class Worker (ThreadExtra):
+            def run(self):
+                self.token.sleep(10)
+
+        errors = []
+        excepthook = threading.excepthook
+        threading.excepthook = errors.append
+
+        try:
+            with ThreadGroup() as group:
+                for _ in range(3):
+                    group.add(Worker(daemon=True))
+
+                group.start()
+                time.sleep(0.02)
+                report = group.stop(timeout=5, force=False)
+
+        finally:
+            threading.excepthook = excepthook
+
+        self.assertEqual(len(report.stopped), 3)
+        self.assertEqual(errors, [])
+
+
+    def test_force(self):
+        def target():
+            try:
+                busy(10)
+
+            except SystemExit as _:
+                ...
+
+        thread = ThreadExtra(target=target, daemon=True)
+        thread.start()
+        self.assertFalse(thread.cancel(timeout=0.02))
+        self.assertTrue(thread.cancel(timeout=0.5, force=True))
+
+
+
+class TestThreadGroup (unittest.TestCase):
+    def test_stop(self):
+        def spin():
+            try:
+                busy(10)
+
+            except SystemExit as _:
+                ...
+
+        group = ThreadGroup()
+
+        for _ in range(20):
+            group.spawn(lambda: current_token().sleep(10))
+
+        stuck = group.spawn(spin)
+        plain = group.add(threading.Thread(target=spin, daemon=True))
+        group.start()
+
+        start = time.monotonic()
+        report = group.stop(timeout=0.2, grace=1)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+        self.assertEqual(len(report.stopped), 20)
+        self.assertEqual(set(report.forced), {stuck, plain})
+        self.assertEqual(report.alive, [])
+        self.assertEqual(len(group), 0)
+
+
+    def test_report_alive(self):
+        event = threading.Event()
+
+        with ThreadGroup() as group:
+            thread = group.spawn(event.wait, 5)
+            report = group.stop(timeout=0.02, force=False)
+            self.assertEqual(report.alive, [thread])
+            self.assertEqual(group.alive(), [thread])
+            event.set()
+
+
+
+class TestThreadRegistry (unittest.TestCase):
+    def setUp(self):
+        self.registry = enable_registry()
+
+
+    def tearDown(self):
+        disable_registry()
+
+
+    def test_snapshot(self):
+        event = threading.Event()
+
+        def parked():
+            busy(0.02)
+            event.wait(5)
+
+        thread = ThreadExtra(target=parked, name="parked")
+        thread.start()
+
+        with ThreadPoolExecutorExtra(max_workers=1, thread_name_prefix="registry") as executor:
+            executor.submit(event.wait, 5)
+            time.sleep(0.05)
+            infos = {info.name: info for info in self.registry.snapshot(stacks=True)}
+            event.set()
+
+        thread.join()
+
+        self.assertIn("parked", infos)
+        self.assertIsNone(infos["parked"].task)
+        self.assertGreaterEqual(infos["parked"].running, 0.05)
+        self.assertIn("parked", [frame.name for frame in infos["parked"].stack])
+
+        if infos["parked"].cpu_time is not None:
+            self.assertGreater(infos["parked"].cpu_time, 0)
+
+        self.assertEqual(infos["registry_0"].task, "Event.wait")
+        self.assertGreater(infos["registry_0"].task_running, 0)
+        self.assertEqual(self.registry.snapshot(), [])
+
+
+    def test_subclass_run(self):
+        event = threading.Event()
+
+        class Parked (ThreadExtra):
+            def run(self):
+                event.wait(5)
+
+        thread = Parked(name="subclass")
+        thread.start()
+        time.sleep(0.02)
+        names = [info.name for info in self.registry.snapshot()]
+        event.set()
+        thread.join()
+
+        self.assertIn("subclass", names)
+        self.assertEqual(self.registry.snapshot(), [])
+
+
+    def test_profiler(self):
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        thread = ThreadExtra(target=busy, args=(0.2,))
+        thread.start()
+        thread.join()
+        profiler.stop()
+
+        self.assertGreater(profiler.samples, 0)
+        names = [key[2] for key, _ in profiler.hot(3)]
+        self.assertIn("busy", names)
+        self.assertIn("run", [key[2] for key, _ in profiler.hot(10, cumulative=True)])
+
+
+
+class TestThreadPoolExecutorExtra (unittest.TestCase):
+    def test_submit_and_map(self):
+        with ThreadPoolExecutorExtra(max_workers=4) as executor:
+            self.assertEqual(executor.submit(pow, 2, 10).result(), 1024)
+            self.assertEqual(list(executor.map(abs, range(-5, 0))), [5, 4, 3, 2, 1])
+
+            future = executor.submit(int, "x")
+            self.assertIsInstance(future.exception(), ValueError)
+
+
+    def test_deadline(self):
+        with ThreadPoolExecutorExtra(max_workers=1) as executor:
+            start = time.monotonic()
+            future = executor.submit_with_deadline(0.05, busy, 10)
+
+            with self.assertRaises(TaskDeadlineExceeded):
+                future.result(timeout=5)
+
+            self.assertLess(time.monotonic() - start, 2)
+
+            # The replacement worker keeps the pool usable.
+            self.assertEqual(executor.submit(pow, 3, 3).result(timeout=5), 27)
+
+        # The abandoned worker is not joined by shutdown, but it does exit.
+        prefix = executor.thread_name_prefix + "_"
+        deadline = time.monotonic() + 5
+
+        while any(thread.name.startswith(prefix) for thread in threading.enumerate()):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+
+    def test_default_timeout(self):
+        with ThreadPoolExecutorExtra(max_workers=2, timeout=0.05) as executor:
+            stuck = executor.submit(busy, 10)
+            quick = executor.submit(busy, 0)
+            self.assertEqual(quick.result(timeout=5), 0)
+            self.assertIsInstance(stuck.exception(timeout=5), TaskDeadlineExceeded)
+
+
+    def test_cooperative_deadline(self):
+        with ThreadPoolExecutorExtra(max_workers=1, timeout=0.02, grace=5) as executor:
+            future = executor.submit(lambda: current_token().sleep(10))
+            self.assertIsInstance(future.exception(timeout=2), TaskDeadlineExceeded)
+
+            # The worker survived the cancellation and is reused.
+            name = executor.submit(lambda: threading.current_thread().name).result(timeout=5)
+            self.assertTrue(name.endswith("_0"))
+
+
+    def test_shutdown(self):
+        executor = ThreadPoolExecutorExtra(max_workers=1)
+        executor.submit(busy, 0.05)
+        pending = executor.submit(busy, 0)
+        executor.shutdown(cancel_futures=True)
+        self.assertTrue(pending.cancelled() or pending.done())
+
+        with self.assertRaises(RuntimeError):
+            executor.submit(busy, 0)
+
+
+
+class TestAsyncBridge (unittest.TestCase):
+    def test_run(self):
+        bridge = AsyncBridge()
+
+        async def main():
+            return await asyncio.gather(bridge.run(pow, 2, 8), bridge.run(sorted, [3, 1, 2], reverse=True))
+
+        self.assertEqual(asyncio.run(main()), [256, [3, 2, 1]])
+
+
+    def test_cancel(self):
+        executor = ThreadPoolExecutorExtra(max_workers=2, grace=0.05)
+        bridge = AsyncBridge(executor=executor)
+        stopped = []
+
+        def cooperative():
+            try:
+                current_token().sleep(10)
+
+            except Cancelled as _:
+                stopped.append(time.monotonic())
+                raise
+
+        async def main():
+            for task in (cooperative, lambda: busy(10)):
+                with self.assertRaises(TimeoutError):
+                    async with asyncio.timeout(0.02):
+                        await bridge.run(task)
+
+            return await bridge.run(abs, -1)
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(main()), 1)
+        self.assertEqual(len(stopped), 1)
+        self.assertLess(stopped[0] - start, 1)
+        executor.shutdown()
+
+
+    def test_limit(self):
+        bridge = AsyncBridge(limit=2, executor=ThreadPoolExecutorExtra(max_workers=8))
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def task():
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+
+            time.sleep(0.01)
+
+            with lock:
+                running[0] -= 1
+
+        async def main():
+            await asyncio.gather(*(bridge.run(task) for _ in range(10)))
+
+        # The same bridge keeps its limit on a second event loop.
+        for _ in range(2):
+            running[1] = 0
+            asyncio.run(main())
+            self.assertEqual(running[1], 2)
+
+        bridge.executor.shutdown()
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,332 @@
+# Licensed under the LGPL 3.0 License.
+# simplepylibs by numlinka.
+# unit test
+
+# std
+import os
+import time
+import pickle
+import asyncio
+import contextvars
+import threading
+import unittest
+
+# tests
+from typex import *
+from typing import ClassVar
+
+
+class TestSingleton (unittest.TestCase):
+    def test_singleton(self):
+        class Config (singleton):
+            def __init__(self, value, extra=None):
+                self.calls = getattr(self, "calls", 0) + 1
+                self.value = value
+
+        first = Config(1)
+        second = Config(2, extra=3)
+        self.assertIs(first, second)
+        self.assertEqual((first.calls, first.value), (1, 1))
+
+        class Child (Config):
+            ...
+
+        child = Child(5)
+        self.assertIsNot(child, first)
+        self.assertEqual(child.value, 5)
+
+        with self.assertRaises(TypeError):
+            singleton()
+
+    def test_concurrent_construction(self):
+        barrier = threading.Barrier(16)
+        calls = []
+
+        class Slow (singleton):
+            def __init__(self):
+                calls.append(threading.get_ident())
+                time.sleep(0.02)
+                self.ready = True
+
+        results = []
+
+        def construct():
+            barrier.wait()
+            instance = Slow()
+            results.append((instance, instance.ready))
+
+        threads = [threading.Thread(target=construct) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(instance) for instance, _ in results}), 1)
+        self.assertTrue(all(ready for _, ready in results))
+
+    def test_reentrant_and_failed_init(self):
+        attempts = []
+
+        class Service (singleton):
+            def __init__(self):
+                attempts.append(1)
+                self.inner = Service()
+                if len(attempts) == 1:
+                    raise RuntimeError("first attempt fails")
+
+        with self.assertRaises(RuntimeError):
+            Service()
+
+        service = Service()
+        self.assertIs(service.inner, service)
+        self.assertEqual(len(attempts), 2)
+
+        Service._singleton_reset()
+        self.assertIsNot(Service(), service)
+
+    def test_inherited_init(self):
+        calls = []
+
+        class Base (object):
+            def __init__(self):
+                calls.append(1)
+                self.n = 0
+
+        for kind in (singleton, thread_singleton, context_singleton):
+            calls.clear()
+
+            class Counter (Base, kind):
+                ...
+
+            counter = Counter()
+            counter.n = 5
+            self.assertIs(Counter(), counter)
+            self.assertEqual((counter.n, len(calls)), (5, 1), kind.__name__)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_fork_reset(self):
+        class Kept (singleton):
+            ...
+
+        class Reset (singleton, fork_reset=True):
+            ...
+
+        kept, reset = Kept(), Reset()
+        read, write = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            os.write(write, bytes([Kept() is kept, Reset() is reset]))
+            os._exit(0)
+
+        os.waitpid(pid, 0)
+        self.assertEqual(os.read(read, 2), bytes([True, False]))
+        os.close(read)
+        os.close(write)
+
+
+class TestSingletonVariants (unittest.TestCase):
+    def test_lazy_singleton(self):
+        calls = []
+
+        class Parser (lazy_singleton):
+            def __init__(self, grammar):
+                calls.append(grammar)
+                self.grammar = grammar
+                self.items = [grammar]
+
+            def parse(self, text):
+                return f"{self.grammar}:{text}"
+
+        parser = Parser("json")
+        self.assertIs(Parser("yaml"), parser)
+        self.assertIsInstance(parser, Parser)
+        self.assertEqual(calls, [])
+
+        self.assertEqual(parser.parse("x"), "json:x")
+        self.assertEqual(calls, ["json"])
+        parser.grammar = "toml"
+        self.assertEqual(Parser().grammar, "toml")
+        self.assertEqual(len(parser.items), 1)
+        self.assertEqual(calls, ["json"])
+
+        Parser._singleton_reset()
+        self.assertEqual(parser.grammar, "json")
+        self.assertEqual(calls, ["json", "json"])
+
+    def test_lazy_singleton_concurrent(self):
+        calls = []
+
+        class Heavy (lazy_singleton):
+            def __init__(self):
+                calls.append(1)
+                time.sleep(0.02)
+                self.value = 1
+
+        barrier = threading.Barrier(8)
+        values = []
+
+        def use():
+            barrier.wait()
+            values.append(Heavy().value)
+
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(values, [1] * 8)
+
+    def test_thread_singleton(self):
+        class Handle (thread_singleton):
+            def __init__(self):
+                self.owner = threading.get_ident()
+
+        main = Handle()
+        self.assertIs(Handle(), main)
+        other = []
+        thread = threading.Thread(target=lambda: other.extend([Handle(), Handle()]))
+        thread.start()
+        thread.join()
+
+        self.assertIs(other[0], other[1])
+        self.assertIsNot(other[0], main)
+        self.assertEqual(main.owner, threading.get_ident())
+
+    def test_context_singleton(self):
+        class Session (context_singleton):
+            def __init__(self, name):
+                self.name = name
+
+        async def task(name):
+            first = Session(name)
+            await asyncio.sleep(0)
+            return first, Session("again")
+
+        async def main():
+            shared = Session("main")
+            results = await asyncio.gather(task("a"), task("b"))
+            return shared, results
+
+        shared, results = asyncio.run(main())
+        for first, second in results:
+            self.assertIs(first, second)
+            self.assertIs(first, shared)
+
+        async def isolated():
+            return await asyncio.gather(task("a"), task("b"))
+
+        (a, _), (b, _) = asyncio.run(isolated())
+        self.assertEqual((a.name, b.name), ("a", "b"))
+
+    def test_context_singleton_reentrant(self):
+        class Node (context_singleton):
+            def __init__(self, fail=False):
+                self.root = Node()
+                if fail:
+                    raise ValueError(fail)
+
+        def run():
+            with self.assertRaises(ValueError):
+                Node(fail=True)
+
+            node = Node()
+            self.assertIs(node.root, node)
+
+        contextvars.copy_context().run(run)
+
+
+class Entry (record):
+    key: str
+    value: int = 0
+    kind: ClassVar[str] = "entry"
+
+
+class Point (record, frozen=True):
+    x: float
+    y: float = 0.0
+
+
+class Point3 (Point):
+    z: float = 0.0
+
+
+class TestRecord (unittest.TestCase):
+    def test_record(self):
+        entry = Entry("a", 1)
+        self.assertEqual(Entry.__slots__, ("key", "value"))
+        self.assertEqual(Entry._record_defaults, {"value": 0})
+        self.assertEqual(Entry.kind, "entry")
+        self.assertEqual(repr(entry), "Entry(key='a', value=1)")
+        self.assertEqual(entry, Entry(key="a", value=1))
+        self.assertNotEqual(entry, Entry("a"))
+        self.assertFalse(hasattr(entry, "__dict__"))
+        self.assertEqual(pickle.loads(pickle.dumps(entry)), entry)
+
+        entry.value = 2
+        self.assertEqual(entry.value, 2)
+        with self.assertRaises(TypeError):
+            hash(entry)
+        with self.assertRaises(AttributeError):
+            entry.other = 1
+        with self.assertRaises(TypeError):
+            record()
+
+    def test_frozen_and_inheritance(self):
+        point = Point3(1.0, z=3.0)
+        self.assertEqual(point, Point3(1.0, 0.0, 3.0))
+        self.assertEqual(hash(point), hash(Point3(1.0, 0.0, 3.0)))
+        self.assertEqual(Point3.__slots__, ("z",))
+        self.assertEqual(pickle.loads(pickle.dumps(point)), point)
+
+        with self.assertRaises(FrozenInstanceError):
+            point.x = 2.0
+
+        with self.assertRaises(TypeError):
+            class Mixed (Point, frozen=False):
+                ...
+
+        with self.assertRaises(TypeError):
+            class Order (record):
+                a: int = 0
+                b: int
+
+        with self.assertRaises(ValueError):
+            class Shared (record):
+                items: list = []
+
+    def test_record_array(self):
+        class Sample (record):
+            index: int
+            value: float
+            label: str = ""
+
+        samples = RecordArray(Sample, (Sample(index, index / 2) for index in range(100)))
+        samples.append((100, 50.0, "last"))
+
+        self.assertEqual(len(samples), 101)
+        self.assertEqual(samples[100], Sample(100, 50.0, "last"))
+        self.assertEqual(samples.column("index").typecode, "q")
+        self.assertEqual(samples.column("value").typecode, "d")
+        self.assertIsInstance(samples.column("label"), list)
+        self.assertEqual(sum(sample.value for sample in samples), sum(index / 2 for index in range(101)))
+
+        head = samples[:3]
+        self.assertIsInstance(head, RecordArray)
+        self.assertEqual(list(head), [Sample(0, 0.0), Sample(1, 0.5), Sample(2, 1.0)])
+        self.assertEqual(head.column("index").typecode, "q")
+        self.assertEqual(samples[::50].column("index").tolist(), [0, 50, 100])
+
+        for values in ((101, 50.5), (101, 50.5, "x", "y"), ("bad", 50.5, "x"), (101, "bad", "x")):
+            with self.assertRaises(TypeError):
+                samples.append(values)
+
+        self.assertEqual(len(samples), 101)
+        self.assertEqual({len(column) for column in samples.columns.values()}, {101})
+
+
+if __name__ == "__main__":
+    unittest.main()